@@ -19,6 +19,7 @@ from rich.table import Table
 from .config import Config
 from .mcp.server import main as mcp_main
 from .models import (
+    DEFAULT_MAX_FILE_SIZE_BYTES,
     Action,
     ActionType,
     PackRequest,
@@ -44,7 +45,9 @@ console = Console()
 
 def get_storage(config: Config) -> FileSystemStorage:
     """Get storage instance from configuration."""
-    return FileSystemStorage(config.registry_root)
+    return FileSystemStorage(
+        config.registry_root, config.durable_writes, config.atomic_writes
+    )
 
 
 def get_packer(config: Config) -> RulePacker:
@@ -454,6 +457,8 @@ def validate(
 
         all_valid = True
         deprecated_count = 0
+        rules_by_id = {rule.id: rule for rule in rules}
+        local_references = storage.check_local_references(rules)
 
         for rule in rules:
             # Skip deprecated rules unless explicitly included
@@ -461,7 +466,11 @@ def validate(
                 deprecated_count += 1
                 continue
 
-            errors = storage.validate_rule(rule)
+            errors = storage.validate_rule(
+                rule,
+                existing_rules_by_id=rules_by_id,
+                local_references=local_references,
+            )
 
             if errors:
                 console.print(f"[red]✗ {rule.id}:[/red]")
@@ -471,6 +480,9 @@ def validate(
             else:
                 console.print(f"[green]✓ {rule.id}[/green]")
 
+            for warning in storage.rule_warnings(rule):
+                console.print(f"  [yellow]⚠ {warning}[/yellow]")
+
         # Warn about deprecated rules
         if deprecated_count > 0:
             console.print(
@@ -510,6 +522,11 @@ def pack(
     include_deprecated: bool = typer.Option(
         False, "--include-deprecated", help="Include deprecated rules"
     ),
+    max_file_size: int = typer.Option(
+        DEFAULT_MAX_FILE_SIZE_BYTES,
+        "--max-file-size",
+        help="Skip content detectors for files larger than this many bytes",
+    ),
     json_output: bool = typer.Option(False, "--json", help="Output as JSON"),
     output_file: str = typer.Option(
         "-", "--output", help="Output file (default: stdout)"
@@ -540,6 +557,7 @@ def pack(
             limit=limit,
             include_deprecated=include_deprecated,
             file_globs=None,
+            max_file_size_bytes=max_file_size,
         )
 
         try:
@@ -70,6 +70,18 @@ class Config:
 
         return registry_path
 
+    @property
+    def durable_writes(self) -> bool:
+        """Get whether saved rule cards are fsynced to disk."""
+        value = self.get("registry.durable_writes", False)
+        return bool(value) if value is not None else False
+
+    @property
+    def atomic_writes(self) -> bool:
+        """Get whether rule cards are saved through a temporary file."""
+        value = self.get("registry.atomic_writes", True)
+        return bool(value) if value is not None else True
+
     @property
     def default_limit(self) -> int:
         """Get default pack limit."""
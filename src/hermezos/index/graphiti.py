@@ -2,17 +2,27 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
 import tempfile
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
 from ..models import PackRequest, RuleCard
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
+# Write buffer for JSONL exports, large enough to hold typical exports whole
+_EXPORT_BUFFER_SIZE = 1 << 20
+
 # Lazy import for optional dependency
 _requests = None
 
@@ -34,6 +44,40 @@ def _get_requests():
     return _requests
 
 
+def _jsonl_line(item: dict[str, Any]) -> bytes:
+    """Encode one item as a canonical JSON line with the stdlib encoder."""
+    line = json.dumps(
+        item,
+        separators=(",", ":"),
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return line.encode("utf-8") + b"\n"
+
+
+def _jsonl_lines(items: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    """Encode items as canonical JSON lines (sorted keys, compact, UTF-8)."""
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+        for item in items:
+            try:
+                yield orjson.dumps(item, option=option)
+            except TypeError:
+                # e.g. integers beyond 64 bits; the stdlib encoder copes
+                yield _jsonl_line(item)
+        return
+
+    for item in items:
+        yield _jsonl_line(item)
+
+
+def _update_digest(lines: Iterable[bytes], digest: Any) -> Iterator[bytes]:
+    """Pass lines through unchanged, feeding each one to `digest`."""
+    for line in lines:
+        digest.update(line)
+        yield line
+
+
 class GraphitiIndex:
     """Graphiti index adapter with export_only and live modes.
 
@@ -64,6 +108,8 @@ class GraphitiIndex:
         # In-memory storage for export_only mode
         self._nodes: dict[str, dict[str, Any]] = {}
         self._edges: list[dict[str, Any]] = []
+        # BLAKE2b digest of the last export (nodes.jsonl then edges.jsonl)
+        self.output_digest: bytes | None = None
 
         if self.mode == "export_only":
             # Ensure export directory exists
@@ -114,83 +160,84 @@ class GraphitiIndex:
 
     def _upsert_card_export(self, card: RuleCard) -> None:
         """Upsert card in export mode - store in memory for later write."""
+        nodes = self._nodes
+        card_id = card.id
+        domain = card.domain
+        tags = card.intent_tags
+        local_refs = [
+            ref for ref in card.references if ref.doc_url.startswith(("./", "../"))
+        ]
+        # Only a card that was upserted before can own edges
+        is_update = card_id in nodes
+
         # Create nodes
         rule_node = {
-            "id": card.id,
+            "id": card_id,
             "type": "RuleCard",
             "fingerprint": card.compute_fingerprint(),
-            "domain": card.domain,
+            "domain": domain,
             "status": card.status.value,
             "severity": card.severity.value,
             "version": card.version,
             "name": card.name,
         }
-        self._nodes[card.id] = rule_node
+        nodes[card_id] = rule_node
 
         # Create domain node
-        domain_id = f"domain:{card.domain}"
+        domain_id = f"domain:{domain}"
         domain_node = {
             "id": domain_id,
             "type": "Domain",
-            "name": card.domain,
+            "name": domain,
         }
-        self._nodes[domain_id] = domain_node
+        nodes[domain_id] = domain_node
 
         # Create intent tag nodes
-        for tag in card.intent_tags:
-            tag_id = f"tag:{tag}"
+        tag_ids = [f"tag:{tag}" for tag in tags]
+        for tag_id, tag in zip(tag_ids, tags, strict=True):
             tag_node = {
                 "id": tag_id,
                 "type": "IntentTag",
                 "name": tag,
             }
-            self._nodes[tag_id] = tag_node
+            nodes[tag_id] = tag_node
 
         # Create document nodes for references
-        for ref in card.references:
-            if ref.doc_url.startswith(("./", "../")):
-                doc_id = f"doc:{ref.doc_url}"
-                doc_node = {
-                    "id": doc_id,
-                    "type": "Doc",
-                    "path": ref.doc_url,
-                    "note": ref.note,
-                }
-                self._nodes[doc_id] = doc_node
+        doc_ids = [f"doc:{ref.doc_url}" for ref in local_refs]
+        for doc_id, ref in zip(doc_ids, local_refs, strict=True):
+            doc_node = {
+                "id": doc_id,
+                "type": "Doc",
+                "path": ref.doc_url,
+                "note": ref.note,
+            }
+            nodes[doc_id] = doc_node
 
         # Remove old edges for this card
-        self._edges = [e for e in self._edges if e.get("source") != card.id]
+        if is_update:
+            self._edges = [e for e in self._edges if e.get("source") != card_id]
 
         # Create edges
+        edges = self._edges
         # RuleCard -> Domain
-        self._edges.append(
+        edges.append(
             {
-                "source": card.id,
+                "source": card_id,
                 "target": domain_id,
                 "type": "OF_DOMAIN",
             }
         )
 
         # RuleCard -> IntentTag
-        for tag in card.intent_tags:
-            self._edges.append(
-                {
-                    "source": card.id,
-                    "target": f"tag:{tag}",
-                    "type": "HAS_TAG",
-                }
-            )
+        edges.extend(
+            {"source": card_id, "target": tag_id, "type": "HAS_TAG"}
+            for tag_id in tag_ids
+        )
 
         # RuleCard -> Doc
-        for ref in card.references:
-            if ref.doc_url.startswith(("./", "../")):
-                self._edges.append(
-                    {
-                        "source": card.id,
-                        "target": f"doc:{ref.doc_url}",
-                        "type": "DOC",
-                    }
-                )
+        edges.extend(
+            {"source": card_id, "target": doc_id, "type": "DOC"} for doc_id in doc_ids
+        )
 
     def _delete_card_export(self, card_id: str) -> None:
         """Delete card from export mode - remove from memory."""
@@ -206,19 +253,17 @@ class GraphitiIndex:
 
     def _write_export_files(self) -> None:
         """Write nodes and edges to JSONL files atomically."""
+        self.output_digest = None
+        digest = hashlib.blake2b(digest_size=16)
         try:
             # Write nodes.jsonl
             nodes_path = self.export_path / "nodes.jsonl"
-            self._write_jsonl_atomic(
-                nodes_path, sorted(self._nodes.values(), key=lambda x: x["id"])
-            )
+            self._write_jsonl_atomic(nodes_path, self._sorted_nodes(), digest)
 
             # Write edges.jsonl
             edges_path = self.export_path / "edges.jsonl"
-            sorted_edges = sorted(
-                self._edges, key=lambda x: (x["source"], x["target"], x["type"])
-            )
-            self._write_jsonl_atomic(edges_path, sorted_edges)
+            self._write_jsonl_atomic(edges_path, self._sorted_edges(), digest)
+            self.output_digest = digest.digest()
 
             logger.info(
                 f"Exported {len(self._nodes)} nodes and "
@@ -228,8 +273,43 @@ class GraphitiIndex:
         except Exception as e:
             logger.error(f"Failed to write export files: {e}")
 
-    def _write_jsonl_atomic(self, path: Path, data: list[dict[str, Any]]) -> None:
-        """Write JSONL data to file atomically."""
+    def _sorted_nodes(self) -> Iterator[dict[str, Any]]:
+        """Yield nodes in export order (by ID).
+
+        Nodes are keyed by their ID, so sorting the keys gives the export
+        order without a key function call per node.
+        """
+        nodes = self._nodes
+        for node_id in sorted(nodes):
+            yield nodes[node_id]
+
+    def _sorted_edges(self) -> Iterator[dict[str, Any]]:
+        """Yield edges in export order (by source, target, type).
+
+        The sort keys are built once as plain tuples, with the insertion
+        index as the final tie-break so equal edges keep their order.
+        """
+        edges = self._edges
+        keys = [(e["source"], e["target"], e["type"], i) for i, e in enumerate(edges)]
+        keys.sort()
+        for key in keys:
+            yield edges[key[3]]
+
+    def _serialize_nodes(self) -> bytes:
+        """Return the exact nodes.jsonl content for the current nodes."""
+        return b"".join(_jsonl_lines(self._sorted_nodes()))
+
+    def _serialize_edges(self) -> bytes:
+        """Return the exact edges.jsonl content for the current edges."""
+        return b"".join(_jsonl_lines(self._sorted_edges()))
+
+    def _write_jsonl_atomic(
+        self, path: Path, data: Iterable[dict[str, Any]], digest: Any = None
+    ) -> None:
+        """Write JSONL data to file atomically, encoding one record at a time.
+
+        If `digest` is given, every written line is also fed to it.
+        """
         # Create temporary file in same directory
         temp_fd = None
         temp_path = None
@@ -241,22 +321,17 @@ class GraphitiIndex:
             )
             temp_path = Path(temp_path_str)
 
-            # Write JSONL content to temporary file
-            with os.fdopen(temp_fd, "w", encoding="utf-8") as f:
-                for item in data:
-                    json.dump(
-                        item,
-                        f,
-                        separators=(",", ":"),
-                        sort_keys=True,
-                        ensure_ascii=False,
-                    )
-                    f.write("\n")
+            # Write JSONL content to temporary file; the buffer coalesces
+            # the lines into large writes
+            with os.fdopen(temp_fd, "wb", buffering=_EXPORT_BUFFER_SIZE) as f:
+                temp_fd = None  # Closed by the file object
+                lines = _jsonl_lines(data)
+                if digest is not None:
+                    lines = _update_digest(lines, digest)
+                f.writelines(lines)
                 f.flush()
                 os.fsync(f.fileno())  # Force write to disk
 
-            temp_fd = None  # Don't close again in finally
-
             # Atomic rename
             temp_path.replace(path)
 
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import logging
+import weakref
+from collections.abc import Iterable
 from pathlib import Path
+from typing import Any
 
 from ..models import PackRequest, RuleCard
 
@@ -30,6 +33,16 @@ def _get_kuzu():
     return _kuzu
 
 
+def _release(conn, db) -> None:
+    """Close a Kùzu connection and its database."""
+    try:
+        conn.close()
+        db.close()
+        logger.debug("Closed Kùzu database connection")
+    except Exception as e:
+        logger.error(f"Error closing Kùzu database: {e}")
+
+
 class KuzuIndex:
     """Kùzu embedded graph database index adapter.
 
@@ -37,6 +50,53 @@ class KuzuIndex:
     for rule prefiltering based on intent tags and domains.
     """
 
+    # Schema statements, run in order; node tables come before the
+    # relationship tables that reference them
+    _SCHEMA_DDL = (
+        """
+        CREATE NODE TABLE IF NOT EXISTS RuleCard(
+            rule_id STRING PRIMARY KEY,
+            fingerprint STRING,
+            domain STRING,
+            status STRING,
+            severity STRING,
+            version INT64,
+            name STRING
+        )
+        """,
+        """
+        CREATE NODE TABLE IF NOT EXISTS IntentTag(
+            tag STRING PRIMARY KEY
+        )
+        """,
+        """
+        CREATE NODE TABLE IF NOT EXISTS Domain(
+            domain STRING PRIMARY KEY
+        )
+        """,
+        """
+        CREATE NODE TABLE IF NOT EXISTS Doc(
+            path STRING PRIMARY KEY,
+            note STRING
+        )
+        """,
+        """
+        CREATE REL TABLE IF NOT EXISTS HAS_TAG(
+            FROM RuleCard TO IntentTag
+        )
+        """,
+        """
+        CREATE REL TABLE IF NOT EXISTS OF_DOMAIN(
+            FROM RuleCard TO Domain
+        )
+        """,
+        """
+        CREATE REL TABLE IF NOT EXISTS DOC(
+            FROM RuleCard TO Doc
+        )
+        """,
+    )
+
     def __init__(self, db_path: Path):
         """Initialize Kùzu index.
 
@@ -51,6 +111,8 @@ class KuzuIndex:
         # Initialize database
         self.db = kuzu.Database(str(self.db_path))
         self.conn = kuzu.Connection(self.db)
+        # Runs at most once: on close(), garbage collection or exit
+        self._finalizer = weakref.finalize(self, _release, self.conn, self.db)
 
         # Initialize schema
         self._init_schema()
@@ -58,70 +120,8 @@ class KuzuIndex:
     def _init_schema(self) -> None:
         """Initialize database schema if not exists."""
         try:
-            # Create node tables
-            self.conn.execute(
-                """
-                CREATE NODE TABLE IF NOT EXISTS RuleCard(
-                    rule_id STRING PRIMARY KEY,
-                    fingerprint STRING,
-                    domain STRING,
-                    status STRING,
-                    severity STRING,
-                    version INT64,
-                    name STRING
-                )
-            """
-            )
-
-            self.conn.execute(
-                """
-                CREATE NODE TABLE IF NOT EXISTS IntentTag(
-                    tag STRING PRIMARY KEY
-                )
-            """
-            )
-
-            self.conn.execute(
-                """
-                CREATE NODE TABLE IF NOT EXISTS Domain(
-                    domain STRING PRIMARY KEY
-                )
-            """
-            )
-
-            self.conn.execute(
-                """
-                CREATE NODE TABLE IF NOT EXISTS Doc(
-                    path STRING PRIMARY KEY,
-                    note STRING
-                )
-            """
-            )
-
-            # Create relationship tables
-            self.conn.execute(
-                """
-                CREATE REL TABLE IF NOT EXISTS HAS_TAG(
-                    FROM RuleCard TO IntentTag
-                )
-            """
-            )
-
-            self.conn.execute(
-                """
-                CREATE REL TABLE IF NOT EXISTS OF_DOMAIN(
-                    FROM RuleCard TO Domain
-                )
-            """
-            )
-
-            self.conn.execute(
-                """
-                CREATE REL TABLE IF NOT EXISTS DOC(
-                    FROM RuleCard TO Doc
-                )
-            """
-            )
+            for statement in self._SCHEMA_DDL:
+                self.conn.execute(statement)
 
             logger.debug("Kùzu schema initialized")
 
@@ -139,28 +139,15 @@ class KuzuIndex:
             List of rule IDs that match the request criteria
         """
         try:
-            # Build query based on request filters
-            conditions = []
-            params = {}
-
-            # Filter by intent tags
             if request.intent_tags:
-                tag_conditions = []
-                for i, tag in enumerate(request.intent_tags):
-                    param_name = f"tag_{i}"
-                    tag_conditions.append(f"t.tag = ${param_name}")
-                    params[param_name] = tag
-
-                conditions.append(f"({' OR '.join(tag_conditions)})")
-
-            # Base query
-            if conditions:
-                query = f"""
+                # One parameterized query for any number of tags
+                query = """
                     MATCH (r:RuleCard)-[:HAS_TAG]->(t:IntentTag)
-                    WHERE {" AND ".join(conditions)}
+                    WHERE t.tag IN $tags
                     RETURN DISTINCT r.rule_id
                     ORDER BY r.rule_id
                 """
+                params = {"tags": list(request.intent_tags)}
             else:
                 # No filters - return all rule IDs
                 query = """
@@ -168,10 +155,13 @@ class KuzuIndex:
                     RETURN r.rule_id
                     ORDER BY r.rule_id
                 """
+                params = {}
 
             # Execute query
             result = self.conn.execute(query, params)
-            rule_ids = [row[0] for row in result.get_as_df().values.tolist()]
+            rule_ids = []
+            while result.has_next():
+                rule_ids.append(result.get_next()[0])
 
             logger.debug(f"Kùzu query returned {len(rule_ids)} candidate rule IDs")
             return rule_ids
@@ -186,23 +176,44 @@ class KuzuIndex:
         Args:
             card: Rule card to upsert
         """
-        try:
-            # Delete existing data for this rule
-            self._delete_card_data(card.id)
+        self.upsert_cards([card])
 
-            # Insert rule card node
-            self.conn.execute(
-                """
-                CREATE (r:RuleCard {
-                    rule_id: $rule_id,
-                    fingerprint: $fingerprint,
-                    domain: $domain,
-                    status: $status,
-                    severity: $severity,
-                    version: $version,
-                    name: $name
-                })
-            """,
+    def upsert_cards(self, cards: Iterable[RuleCard]) -> None:
+        """Insert or update many rule cards with one query per table.
+
+        Each step UNWINDs a list parameter, so the number of round-trips to
+        Kùzu does not grow with the number of cards. If a card ID appears
+        more than once, the last card wins, as with repeated upsert_card().
+        If the batch fails, the cards are upserted one at a time so a single
+        bad card does not keep the others out of the index.
+
+        Args:
+            cards: Rule cards to upsert
+        """
+        by_id = {card.id: card for card in cards}
+        if not by_id:
+            return
+
+        try:
+            self._upsert_batch(by_id)
+        except Exception as e:
+            if len(by_id) == 1:
+                logger.error(f"Failed to upsert card {next(iter(by_id))} in Kùzu: {e}")
+                return
+            logger.warning(
+                f"Batched upsert of {len(by_id)} cards failed in Kùzu ({e}); "
+                "retrying one card at a time"
+            )
+            for card in by_id.values():
+                self.upsert_cards([card])
+
+    def _upsert_batch(self, by_id: dict[str, RuleCard]) -> None:
+        """Replace the given cards in the index, raising on any failure."""
+        rules: list[dict[str, Any]] = []
+        tag_links: list[dict[str, str]] = []
+        doc_links: list[dict[str, str]] = []
+        for card in by_id.values():
+            rules.append(
                 {
                     "rule_id": card.id,
                     "fingerprint": card.compute_fingerprint(),
@@ -211,72 +222,107 @@ class KuzuIndex:
                     "severity": card.severity.value,
                     "version": card.version,
                     "name": card.name,
-                },
+                }
             )
+            tag_links.extend(
+                {"rule_id": card.id, "tag": tag} for tag in card.intent_tags
+            )
+            doc_links.extend(
+                {"rule_id": card.id, "path": ref.doc_url, "note": ref.note or ""}
+                for ref in card.references
+                if ref.doc_url.startswith(("./", "../"))
+            )
+
+        # Delete existing data for these rules
+        self.conn.execute(
+            """
+            UNWIND $rule_ids AS rule_id
+            MATCH (r:RuleCard {rule_id: rule_id})
+            DETACH DELETE r
+        """,
+            {"rule_ids": list(by_id)},
+        )
 
-            # Insert domain node if not exists
+        # Insert rule card nodes
+        self.conn.execute(
+            """
+            UNWIND $rules AS rule
+            CREATE (r:RuleCard {
+                rule_id: rule.rule_id,
+                fingerprint: rule.fingerprint,
+                domain: rule.domain,
+                status: rule.status,
+                severity: rule.severity,
+                version: rule.version,
+                name: rule.name
+            })
+        """,
+            {"rules": rules},
+        )
+
+        # Insert domain nodes if not exists
+        self.conn.execute(
+            """
+            UNWIND $domains AS domain
+            MERGE (d:Domain {domain: domain})
+        """,
+            {"domains": sorted({rule["domain"] for rule in rules})},
+        )
+
+        # Create domain relationships
+        self.conn.execute(
+            """
+            UNWIND $rules AS rule
+            MATCH (r:RuleCard {rule_id: rule.rule_id})
+            MATCH (d:Domain {domain: rule.domain})
+            CREATE (r)-[:OF_DOMAIN]->(d)
+        """,
+            {"rules": rules},
+        )
+
+        if tag_links:
+            # Insert intent tag nodes if not exists
             self.conn.execute(
                 """
-                MERGE (d:Domain {domain: $domain})
+                UNWIND $tags AS tag
+                MERGE (t:IntentTag {tag: tag})
             """,
-                {"domain": card.domain},
+                {"tags": sorted({link["tag"] for link in tag_links})},
             )
 
-            # Create domain relationship
+            # Create tag relationships
             self.conn.execute(
                 """
-                MATCH (r:RuleCard {rule_id: $rule_id})
-                MATCH (d:Domain {domain: $domain})
-                CREATE (r)-[:OF_DOMAIN]->(d)
+                UNWIND $links AS link
+                MATCH (r:RuleCard {rule_id: link.rule_id})
+                MATCH (t:IntentTag {tag: link.tag})
+                CREATE (r)-[:HAS_TAG]->(t)
             """,
-                {"rule_id": card.id, "domain": card.domain},
+                {"links": tag_links},
             )
 
-            # Insert intent tags and relationships
-            for tag in card.intent_tags:
-                # Insert tag node if not exists
-                self.conn.execute(
-                    """
-                    MERGE (t:IntentTag {tag: $tag})
-                """,
-                    {"tag": tag},
-                )
-
-                # Create tag relationship
-                self.conn.execute(
-                    """
-                    MATCH (r:RuleCard {rule_id: $rule_id})
-                    MATCH (t:IntentTag {tag: $tag})
-                    CREATE (r)-[:HAS_TAG]->(t)
-                """,
-                    {"rule_id": card.id, "tag": tag},
-                )
-
-            # Insert document nodes and relationships
-            for ref in card.references:
-                if ref.doc_url.startswith(("./", "../")):
-                    # Insert doc node if not exists
-                    self.conn.execute(
-                        """
-                        MERGE (d:Doc {path: $path, note: $note})
-                    """,
-                        {"path": ref.doc_url, "note": ref.note or ""},
-                    )
-
-                    # Create doc relationship
-                    self.conn.execute(
-                        """
-                        MATCH (r:RuleCard {rule_id: $rule_id})
-                        MATCH (d:Doc {path: $path})
-                        CREATE (r)-[:DOC]->(d)
-                    """,
-                        {"rule_id": card.id, "path": ref.doc_url},
-                    )
-
-            logger.debug(f"Upserted rule card {card.id} in Kùzu")
+        if doc_links:
+            # Insert document nodes if not exists
+            self.conn.execute(
+                """
+                UNWIND $links AS link
+                MERGE (d:Doc {path: link.path, note: link.note})
+            """,
+                {"links": doc_links},
+            )
 
-        except Exception as e:
-            logger.error(f"Failed to upsert card {card.id} in Kùzu: {e}")
+            # Create doc relationships
+            self.conn.execute(
+                """
+                UNWIND $links AS link
+                MATCH (r:RuleCard {rule_id: link.rule_id})
+                MATCH (d:Doc {path: link.path})
+                CREATE (r)-[:DOC]->(d)
+            """,
+                {"links": doc_links},
+            )
+
+        logger.debug(f"Upserted {len(rules)} rule cards in Kùzu")
 
     def delete_card(self, card_id: str) -> None:
         """Delete a rule card from the index.
@@ -303,12 +349,10 @@ class KuzuIndex:
         )
 
     def close(self) -> None:
-        """Close the index adapter and clean up resources."""
-        try:
-            if hasattr(self, "conn"):
-                self.conn.close()
-            if hasattr(self, "db"):
-                self.db.close()
-            logger.debug("Closed Kùzu database connection")
-        except Exception as e:
-            logger.error(f"Error closing Kùzu database: {e}")
+        """Close the index adapter and clean up resources.
+
+        Safe to call more than once; only the first call closes the database.
+        """
+        finalizer = getattr(self, "_finalizer", None)
+        if finalizer is not None:
+            finalizer()
@@ -47,7 +47,11 @@ class MCPServer:
     def __init__(self, config_path: Path | None = None):
         """Initialize MCP server."""
         self.config = Config(config_path)
-        self.storage = FileSystemStorage(self.config.registry_root)
+        self.storage = FileSystemStorage(
+            self.config.registry_root,
+            self.config.durable_writes,
+            self.config.atomic_writes,
+        )
         self.packer = RulePacker()
 
     def _send_response(self, response: dict[str, Any]) -> None:
@@ -276,7 +280,11 @@ if HAS_NATIVE_MCP:
 
         def __init__(self):
             self.config = Config()
-            self.storage = FileSystemStorage(self.config.registry_root)
+            self.storage = FileSystemStorage(
+                self.config.registry_root,
+                self.config.durable_writes,
+                self.config.atomic_writes,
+            )
             self.packer = RulePacker()
 
             # Initialize MCP server
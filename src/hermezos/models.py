@@ -4,12 +4,26 @@ from __future__ import annotations
 
 import hashlib
 import json
+from collections.abc import Mapping
 from datetime import datetime
 from enum import Enum
+from functools import cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    field_validator,
+    model_validator,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
 
 
 def to_canonical_json(obj: Any) -> str:
@@ -44,6 +58,27 @@ def to_canonical_json(obj: Any) -> str:
     )
 
 
+def _canonical_json_bytes(obj: Any) -> bytes:
+    """Encode obj like to_canonical_json(), directly as UTF-8 bytes.
+
+    Used for fingerprinting, where only the bytes are hashed; orjson writes
+    the same compact, key-sorted output without an intermediate str.
+    """
+    if hasattr(obj, "model_dump"):
+        data = obj.model_dump(exclude_unset=True)
+    else:
+        data = obj if isinstance(obj, dict) else obj.__dict__
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder copes
+    return json.dumps(
+        data, separators=(",", ":"), sort_keys=True, ensure_ascii=False
+    ).encode("utf-8")
+
+
 class Status(str, Enum):
     """Rule card status enumeration."""
 
@@ -60,6 +95,28 @@ class Severity(str, Enum):
     ERROR = "error"
 
 
+# Files larger than this are skipped by content detectors by default
+DEFAULT_MAX_FILE_SIZE_BYTES = 8 * 1024 * 1024
+
+# Status rank for sorting (active > draft > deprecated)
+_STATUS_RANK = MappingProxyType(
+    {
+        Status.ACTIVE: 0,
+        Status.DRAFT: 1,
+        Status.DEPRECATED: 2,
+    }
+)
+
+# Severity rank for sorting (error > warning > info)
+_SEVERITY_RANK = MappingProxyType(
+    {
+        Severity.ERROR: 0,
+        Severity.WARNING: 1,
+        Severity.INFO: 2,
+    }
+)
+
+
 class ActionType(str, Enum):
     """Action type enumeration."""
 
@@ -166,6 +223,8 @@ class RuleCard(BaseModel):
     )
     provenance: Provenance = Field(..., description="Provenance information")
 
+    _normalized: bool = PrivateAttr(default=False)
+
     @field_validator("id")
     @classmethod
     def validate_id_format(cls, v: str) -> str:
@@ -190,6 +249,21 @@ class RuleCard(BaseModel):
             return False
         return bool(v)
 
+    @model_validator(mode="after")
+    def mark_normalized(self) -> RuleCard:
+        """Mark cards that normalize() would leave unchanged as normalized.
+
+        Cards saved after normalize() already carry their derived defaults,
+        so loading them does not need another normalize() pass.
+        """
+        if (
+            self.retriable is not None
+            and (self.hint or not self.action.steps)
+            and (self.references or "references" in self.model_fields_set)
+        ):
+            self._normalized = True
+        return self
+
     def normalize(self) -> RuleCard:
         """Normalize rule card by applying derived defaults and validations.
 
@@ -208,18 +282,69 @@ class RuleCard(BaseModel):
         if not self.references:
             self.references = []
 
+        self._normalized = True
+
         return self
 
+    @property
+    def is_normalized(self) -> bool:
+        """Whether the card is known to be in normalized form."""
+        return self._normalized
+
+    def model_copy(
+        self, *, update: Mapping[str, Any] | None = None, deep: bool = False
+    ) -> RuleCard:
+        """Copy the card, dropping the normalization flag on updates."""
+        copy = super().model_copy(update=update, deep=deep)
+        if update:
+            copy._normalized = False
+        return copy
+
+    def __eq__(self, other: object) -> bool:
+        """Compare cards by field values only.
+
+        The private normalization flag is derived state and must not make
+        equal content compare unequal.
+        """
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and self.__dict__ == other.__dict__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute, dropping derived state on field changes."""
+        super().__setattr__(name, value)
+        if name in RuleCard.model_fields:
+            self._normalized = False
+
+    @property
+    def sort_key(self) -> tuple[int, int, int, str]:
+        """Deterministic ordering key: status, severity, version desc, id.
+
+        Built from the current field values on every access, so it always
+        reflects reassigned fields.
+        """
+        return (
+            _STATUS_RANK[self.status],  # status asc (active first)
+            _SEVERITY_RANK[self.severity],  # severity asc (error first)
+            -self.version,  # version desc (higher versions first)
+            self.id,  # id asc (alphabetical)
+        )
+
     def compute_fingerprint(self) -> str:
-        """Compute SHA256 fingerprint of the rule card using canonical JSON."""
+        """Compute SHA256 fingerprint of the rule card using canonical JSON.
+
+        Not cached: nested models and lists can be changed in place, and
+        checking the content for changes costs more than hashing it.
+        """
         # Normalize the rule card first
         normalized = self.normalize()
 
-        # Create canonical JSON representation
-        canonical_json = to_canonical_json(normalized)
-
-        # Compute SHA256 hash
-        return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+        # Compute SHA256 hash of the canonical JSON representation
+        return hashlib.sha256(_canonical_json_bytes(normalized)).hexdigest()
 
 
 class PackRequest(BaseModel):
@@ -235,6 +360,10 @@ class PackRequest(BaseModel):
     file_globs: list[str] | None = Field(
         None, description="File glob patterns to constrain file walker"
     )
+    max_file_size_bytes: int | None = Field(
+        default=DEFAULT_MAX_FILE_SIZE_BYTES,
+        description="Skip content detectors for larger files (None for no limit)",
+    )
 
 
 class RuleMatch(BaseModel):
@@ -278,26 +407,53 @@ class PackBundle(BaseModel):
     @model_validator(mode="after")
     def compute_fingerprint(self) -> PackBundle:
         """Compute pack fingerprint from rule fingerprints using canonical JSON."""
-        # Sort rules by fingerprint for deterministic ordering
-        sorted_rules = (
-            sorted(self.rules, key=lambda r: r.fingerprint) if self.rules else []
-        )
-        rule_fps = [r.fingerprint for r in sorted_rules]
+        self._compute_fingerprint()
+        return self
+
+    def _compute_fingerprint(self) -> None:
+        """Set pack_fingerprint and total_rules from the current rules.
+
+        Split out of the validator so bundles built with model_construct()
+        (which skips validation) can still be fingerprinted.
+        """
+        # Sort rule fingerprints for deterministic ordering
+        rule_fps = sorted(r.fingerprint for r in self.rules)
 
         # Include pack request in fingerprint computation (always generate fingerprint)
+        # max_file_size_bytes is left out at its default, so packs keep the
+        # fingerprints they had before the field was added
+        request_data = self.pack_request.model_dump()
+        if request_data["max_file_size_bytes"] == DEFAULT_MAX_FILE_SIZE_BYTES:
+            del request_data["max_file_size_bytes"]
+
         pack_data = {
-            "request": self.pack_request.model_dump(),
+            "request": request_data,
             "rule_fingerprints": rule_fps,
             "created_at": self.created_at,
         }
-
-        canonical_json = to_canonical_json(pack_data)
         self.pack_fingerprint = hashlib.sha256(
-            canonical_json.encode("utf-8")
+            _canonical_json_bytes(pack_data)
         ).hexdigest()
 
         self.total_rules = len(self.rules)
-        return self
+
+
+@cache
+def _model_json_schemas() -> dict[str, dict[str, Any]]:
+    """Build the JSON schemas for all exported models once per process."""
+    return {
+        "RuleCard": RuleCard.model_json_schema(),
+        "PackRequest": PackRequest.model_json_schema(),
+        "PackBundle": PackBundle.model_json_schema(),
+        "RuleMatch": RuleMatch.model_json_schema(),
+    }
+
+
+def _schema_to_json(schema: dict[str, Any]) -> bytes:
+    """Serialize a JSON schema with sorted keys and 2-space indentation."""
+    if orjson is not None:
+        return orjson.dumps(schema, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    return json.dumps(schema, indent=2, sort_keys=True).encode("utf-8")
 
 
 def export_json_schemas(output_dir: Path) -> None:
@@ -308,15 +464,8 @@ def export_json_schemas(output_dir: Path) -> None:
     """
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    schemas = {
-        "RuleCard": RuleCard.model_json_schema(),
-        "PackRequest": PackRequest.model_json_schema(),
-        "PackBundle": PackBundle.model_json_schema(),
-        "RuleMatch": RuleMatch.model_json_schema(),
-    }
-
-    for name, schema in schemas.items():
+    for name, schema in _model_json_schemas().items():
         schema_file = output_dir / f"{name.lower()}.json"
-        with open(schema_file, "w", encoding="utf-8") as f:
-            json.dump(schema, f, indent=2, sort_keys=True)
+        with open(schema_file, "wb") as f:
+            f.write(_schema_to_json(schema))
         print(f"Exported {name} schema to {schema_file}")
@@ -5,8 +5,13 @@ from __future__ import annotations
 import fnmatch
 import os
 import re
+import stat
+from collections import Counter
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
+from operator import attrgetter
 from pathlib import Path
 from typing import Any
 
@@ -17,11 +22,485 @@ from .models import (
     PackRequest,
     RuleCard,
     RuleMatch,
-    Severity,
     Status,
     TriggerType,
 )
 
+try:
+    import ahocorasick  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional speedup
+    ahocorasick = None
+
+try:
+    import re2  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover - optional speedup
+    re2 = None
+
+
+# Below this many files the thread pool costs more than it saves
+_PARALLEL_SCAN_MIN_FILES = 64
+
+# Characters that give a detector pattern regex meaning (plus line breaks,
+# which a line-by-line regex search can never match)
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()\n\r")
+
+
+@lru_cache(maxsize=1024)
+def _literal_pattern(pattern: str) -> str | None:
+    """Return pattern if it is a plain literal, or None if it needs regex."""
+    if not pattern or _REGEX_METACHARS.intersection(pattern):
+        return None
+    return pattern
+
+
+@lru_cache(maxsize=1024)
+def _literal_bytes(pattern: str) -> bytes | None:
+    """Return a plain literal pattern as UTF-8 bytes, or None if it needs regex.
+
+    UTF-8 is self-synchronizing, so finding these bytes in a file finds the
+    literal in its decoded text.
+    """
+    literal = _literal_pattern(pattern)
+    if literal is None:
+        return None
+    try:
+        return literal.encode("utf-8")
+    except UnicodeEncodeError:
+        # Lone surrogates never appear in decoded file text
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _text_pattern(pattern: str, flags: int = 0) -> re.Pattern[str]:
+    """Compile a detector pattern once for text searches."""
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=1024)
+def _bytes_pattern(pattern: str) -> re.Pattern[bytes] | None:
+    """Compile an ASCII pattern as a multi-line bytes regex.
+
+    Returns None for patterns that only work as str regexes (non-ASCII text
+    or escapes like \\u), which need the decoded text path.
+    """
+    if not pattern.isascii():
+        return None
+    try:
+        return re.compile(pattern.encode("ascii"), re.MULTILINE)
+    except re.error:
+        return None
+
+
+# Shortest required literal worth adding to the detector prefilter
+_MIN_PREFILTER_LITERAL = 3
+
+# Hex digits taken by the \x, \u and \U escapes
+_ESCAPE_ARG_LENGTHS = {"x": 2, "u": 4, "U": 8}
+
+_QUANTIFIER_BRACES = re.compile(r"\{\d*(?:,\d*)?\}")
+
+
+@lru_cache(maxsize=1024)
+def _required_literal(pattern: str) -> str | None:
+    """Return the longest literal that every match of pattern must contain.
+
+    Only top-level runs of plain characters are considered; groups, classes,
+    escapes like \\d and anything made optional by a quantifier break a run.
+    Returns None when no run is long enough, or when the pattern has a
+    top-level alternation or inline flags that make literals unreliable.
+    """
+    if "(?" in pattern:
+        return None
+
+    best = ""
+    run: list[str] = []
+    depth = 0
+    prev_literal = False
+    i = 0
+    n = len(pattern)
+
+    def end_run() -> None:
+        nonlocal best
+        if depth == 0 and len(run) > len(best):
+            best = "".join(run)
+        run.clear()
+
+    while i < n:
+        char = pattern[i]
+        literal = None
+        if char == "\\":
+            escaped = pattern[i + 1 : i + 2]
+            i += 2
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            elif escaped in _ESCAPE_ARG_LENGTHS:
+                # Skip the code point digits so they are not read as text
+                i += _ESCAPE_ARG_LENGTHS[escaped]
+            elif escaped == "N":
+                close = pattern.find("}", i)
+                i = close + 1 if close != -1 else n
+            elif escaped.isdigit():
+                # Octal escapes and backreferences take up to two more digits
+                for _ in range(2):
+                    if i < n and pattern[i].isdigit():
+                        i += 1
+        elif char == "[":
+            i += 1
+            if pattern[i : i + 1] == "^":
+                i += 1
+            if pattern[i : i + 1] == "]":
+                i += 1
+            while i < n and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            if i >= n:
+                return None
+            i += 1
+        elif char in "*?{":
+            if prev_literal and run:
+                run.pop()
+            if char == "{":
+                braces = _QUANTIFIER_BRACES.match(pattern, i)
+                i = braces.end() if braces else i + 1
+            else:
+                i += 1
+        elif char == "|":
+            if depth == 0:
+                return None
+            i += 1
+        else:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char not in ".^$+\n\r":
+                literal = char
+            i += 1
+
+        if literal is not None and depth == 0:
+            run.append(literal)
+            prev_literal = True
+        else:
+            end_run()
+            prev_literal = False
+
+    end_run()
+    return best if len(best) >= _MIN_PREFILTER_LITERAL else None
+
+
+# Line breaks that str.splitlines() honours but bytes.splitlines() does not
+# (the last two are U+0085 and U+2028/U+2029 encoded as UTF-8)
+_TEXT_ONLY_LINE_BREAKS = re.compile(rb"[\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+
+# A carriage return that is not part of a CRLF pair
+_LONE_CR = re.compile(rb"\r(?!\n)")
+
+# Pattern syntax that can see past the edges of a line, so a hit in the
+# whole buffer need not be a hit on that line alone (and vice versa)
+_LINE_CONTEXT_TOKENS = ("\\A", "\\Z", "\\z", "(?=", "(?!", "(?<")
+
+
+@lru_cache(maxsize=1024)
+def _whole_buffer_safe(pattern: str) -> bool:
+    """Whether pattern can be searched across a whole buffer at once."""
+    return not any(token in pattern for token in _LINE_CONTEXT_TOKENS)
+
+
+def _past_last_line(match: re.Match[Any], buffer: bytes | str) -> bool:
+    """Whether match is the empty match after a buffer's final line break.
+
+    splitlines() yields no line there, so a line-by-line search never
+    sees it.
+    """
+    return match.start() == len(buffer) and (not buffer or buffer[-1:] in (b"\n", "\n"))
+
+
+def _find_pattern_line(content: bytes, pattern: str) -> int | None:
+    """Return the 1-based line of the first match of pattern in file content.
+
+    Lines are those of the UTF-8 text's splitlines(), and each line is
+    matched on its own. Where that gives the same answer, the search runs
+    over the whole buffer in one call: in the raw bytes for ASCII patterns
+    over ASCII files, skipping UTF-8 decoding, or in the decoded text
+    otherwise so Unicode character classes keep their meaning. A hit that
+    spans a line break falls back to a line-by-line search.
+    """
+    if _TEXT_ONLY_LINE_BREAKS.search(content) is None:
+        has_cr = b"\r" in content
+        whole_buffer = not has_cr and _whole_buffer_safe(pattern)
+
+        literal = _literal_bytes(pattern)
+        if literal is not None and not (has_cr and _LONE_CR.search(content)):
+            # Plain substring search, no regex engine needed
+            pos = content.find(literal)
+            return content.count(b"\n", 0, pos) + 1 if pos != -1 else None
+
+        compiled = _bytes_pattern(pattern) if content.isascii() else None
+        if compiled is not None:
+            if whole_buffer:
+                byte_match = compiled.search(content)
+                if byte_match is None or _past_last_line(byte_match, content):
+                    return None
+                if b"\n" not in byte_match.group():
+                    return content.count(b"\n", 0, byte_match.start()) + 1
+
+            for line_num, raw_line in enumerate(content.splitlines(), 1):
+                if compiled.search(raw_line):
+                    return line_num
+            return None
+
+        text = content.decode("utf-8", errors="ignore")
+        if whole_buffer:
+            text_match = _text_pattern(pattern, re.MULTILINE).search(text)
+            if text_match is None or _past_last_line(text_match, text):
+                return None
+            if "\n" not in text_match.group():
+                return text.count("\n", 0, text_match.start()) + 1
+    else:
+        text = content.decode("utf-8", errors="ignore")
+
+    search = _text_pattern(pattern).search
+    for line_num, line in enumerate(text.splitlines(), 1):
+        if search(line):
+            return line_num
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _glob_union(globs: tuple[str, ...]) -> re.Pattern[str]:
+    """Compile fnmatch globs into one regex matching any of them.
+
+    Equivalent to any(fnmatch.fnmatch(path, g) for g in globs) when matched
+    against os.path.normcase(path), but evaluated in a single regex call.
+    """
+    return re.compile(
+        "|".join(fnmatch.translate(os.path.normcase(glob)) for glob in globs)
+    )
+
+
+# Directories never scanned for target files
+_SKIP_DIRS = frozenset(
+    {"__pycache__", "node_modules", "build", "dist", ".git", "target"}
+)
+
+# Artifact suffixes never scanned as target files
+_SKIP_SUFFIXES = (".pyc", ".pyo", ".tmp", ".log")
+
+
+def _walk_target_files(root: str) -> list[str]:
+    """List candidate files below root in a single os.scandir walk.
+
+    Visits files in the same order as a top-down os.walk and builds the
+    same strings as joining pathlib paths (so a root of "." yields bare
+    relative names). Hidden entries, skipped directories, artifacts and
+    symlinked directories are left out.
+    """
+    files: list[str] = []
+    join = os.path.join
+    stack = ["" if root == "." else root]
+    while stack:
+        top = stack.pop()
+        try:
+            entries = os.scandir(top or ".")
+        except OSError:
+            continue
+        subdirs = []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith("."):
+                    continue
+                entry_path = join(top, name) if top else name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if name not in _SKIP_DIRS and not entry.is_symlink():
+                        subdirs.append(entry_path)
+                elif not name.endswith(_SKIP_SUFFIXES):
+                    files.append(entry_path)
+        # Reversed so subdirectories are walked in listing order
+        stack.extend(reversed(subdirs))
+    return files
+
+
+def _path_parts(target_path: Path | str) -> tuple[str, str, str]:
+    """Return (path string, lowercased suffix, file name) for a path.
+
+    The suffix follows Path.suffix semantics; computing all three once per
+    file avoids rebuilding them from Path objects for every rule.
+    """
+    path_str = os.fspath(target_path)
+    path_name = os.path.basename(path_str)
+    dot = path_name.rfind(".")
+    path_ext = path_name[dot:].lower() if 0 < dot < len(path_name) - 1 else ""
+    return path_str, path_ext, path_name
+
+
+class _NeedleMatcher:
+    """Match many literal substrings against a path in a single scan.
+
+    Uses a pyahocorasick automaton when the optional dependency is
+    installed and falls back to plain substring checks otherwise.
+    """
+
+    def __init__(self, needles: Iterable[str]):
+        self._needle_set = frozenset(needles)
+        self._needles = sorted(self._needle_set)
+        self._automaton = None
+
+        words = [needle for needle in self._needles if needle]
+        if ahocorasick is not None and words:
+            automaton = ahocorasick.Automaton()
+            for word in words:
+                automaton.add_word(word, word)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def __bool__(self) -> bool:
+        return bool(self._needles)
+
+    def __contains__(self, needle: str) -> bool:
+        return needle in self._needle_set
+
+    def find(self, text: str) -> set[str]:
+        """Return the set of needles contained in text."""
+        if self._automaton is None:
+            return {needle for needle in self._needles if needle in text}
+
+        found = {needle for _, needle in self._automaton.iter(text)}
+        if self._needles[0] == "":
+            # The empty needle sorts first and is contained in every string
+            found.add("")
+        return found
+
+
+# Python syntax that RE2 accepts but reads differently: "{,n}" is a literal
+# to RE2, and "[[:" opens a POSIX class instead of a "[" or ":" member
+_RE2_DIVERGENT_TOKENS = ("{,", "[[:")
+
+
+class _PatternSet:
+    """Test many regex detector patterns against a file in a single scan.
+
+    Patterns are compiled into one RE2 set, which reports every pattern
+    matching somewhere in a buffer in linear time. Only ASCII patterns that
+    RE2 parses with the same meaning as re, over ASCII files whose only line
+    break is \\n, are covered; any pattern or file outside that is left to
+    the regular per-pattern search.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        options = re2.Options()
+        options.log_errors = False
+        self._set = re2.Set.SearchSet(options)
+        self._patterns: list[str] = []
+
+        for pattern in sorted(set(patterns)):
+            if (
+                not pattern.isascii()
+                or not _whole_buffer_safe(pattern)
+                or any(token in pattern for token in _RE2_DIVERGENT_TOKENS)
+                or _bytes_pattern(pattern) is None
+            ):
+                continue
+            try:
+                self._set.Add(b"(?m)" + pattern.encode("ascii"))
+            except re2.error:
+                # Lookarounds, backreferences and other re-only syntax
+                continue
+            self._patterns.append(pattern)
+
+        self._pattern_set = frozenset(self._patterns)
+        if self._patterns:
+            self._set.Compile()
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._pattern_set
+
+    def find(self, content: bytes) -> set[str] | None:
+        """Return the patterns matching content, or None if it is not covered."""
+        if (
+            not content.isascii()
+            or b"\r" in content
+            or _TEXT_ONLY_LINE_BREAKS.search(content) is not None
+        ):
+            return None
+        # Match() returns None rather than an empty list when nothing matches
+        return {self._patterns[i] for i in self._set.Match(content) or ()}
+
+
+class _FileSource:
+    """One file's contents, read at most once and shared by its detectors.
+
+    With a literal prefilter, the decoded text is scanned once for every
+    required literal of every regex detector, so detectors whose literal is
+    absent can be skipped without running their regex. With a pattern set,
+    the patterns it covers are all tested in one pass instead. Files larger
+    than max_size are never read.
+    """
+
+    def __init__(
+        self,
+        path_str: str,
+        literals: _NeedleMatcher | None = None,
+        max_size: int | None = None,
+        patterns: _PatternSet | None = None,
+    ):
+        self.path_str = path_str
+        self._literals = literals
+        self._max_size = max_size
+        self._patterns = patterns
+        self._content: bytes | None = None
+        self._too_large = False
+        self._found: set[str] | None = None
+        self._matched: set[str] | None = None
+        self._uncovered = False
+
+    @property
+    def content(self) -> bytes | None:
+        """The raw file bytes, or None if the file is over the size limit."""
+        if self._content is None and not self._too_large:
+            with open(self.path_str, "rb") as f:
+                if (
+                    self._max_size is not None
+                    and os.fstat(f.fileno()).st_size > self._max_size
+                ):
+                    self._too_large = True
+                    return None
+                self._content = f.read()
+        return self._content
+
+    def may_match(self, pattern: str) -> bool:
+        """Return False only if pattern cannot match anywhere in the file."""
+        patterns = self._patterns
+        if patterns is not None and not self._uncovered and pattern in patterns:
+            if self._matched is None:
+                content = self.content
+                if content is None:
+                    return False
+                self._matched = patterns.find(content)
+                self._uncovered = self._matched is None
+            if self._matched is not None:
+                return pattern in self._matched
+
+        literals = self._literals
+        if literals is None:
+            return True
+        literal = _required_literal(pattern)
+        if literal is None or literal not in literals:
+            return True
+        if self._found is None:
+            content = self.content
+            if content is None:
+                return False
+            text = content.decode("utf-8", errors="ignore")
+            self._found = literals.find(text)
+        return literal in self._found
+
 
 class RulePacker:
     """Handles rule selection and packing logic."""
@@ -30,20 +509,6 @@ class RulePacker:
         """Initialize packer with HermezOS version."""
         self.hermez_version = hermez_version
 
-        # Status rank for sorting (active > draft > deprecated)
-        self._status_rank = {
-            Status.ACTIVE: 0,
-            Status.DRAFT: 1,
-            Status.DEPRECATED: 2,
-        }
-
-        # Severity rank for sorting (error > warning > info)
-        self._severity_rank = {
-            Severity.ERROR: 0,
-            Severity.WARNING: 1,
-            Severity.INFO: 2,
-        }
-
     def pack(
         self,
         rules: Iterable[RuleCard],
@@ -61,7 +526,11 @@ class RulePacker:
             PackBundle containing matched rules and metadata
         """
         # Convert iterable to list for multiple iterations
-        rule_list = list(rules)
+        rule_list = rules if isinstance(rules, list) else list(rules)
+
+        # Drop deprecated rules up front unless explicitly allowed
+        active, deprecated = self._partition(rule_list)
+        rule_list = active + deprecated if request.include_deprecated else active
 
         # Apply index prefilter if available
         if index:
@@ -89,13 +558,16 @@ class RulePacker:
         target_paths = self._collect_target_paths(request)
 
         # Evaluate rules against target paths
-        rule_matches = self._evaluate_rules(sorted_rules, target_paths)
+        rule_matches = self._evaluate_rules(
+            sorted_rules, target_paths, request.max_file_size_bytes
+        )
 
         # Build actions summary
         actions_summary = self._build_actions_summary(rule_matches)
 
-        # Create pack bundle
-        bundle = PackBundle(
+        # Create pack bundle; the packer only produces already-validated
+        # models, so skip re-validating every nested RuleMatch and RuleCard
+        bundle = PackBundle.model_construct(
             pack_request=request,
             rules=rule_matches,
             hermez_version=self.hermez_version,
@@ -104,6 +576,7 @@ class RulePacker:
             cards=self._normalize_rule_cards(rule_matches),
             actions_summary=actions_summary,
         )
+        bundle._compute_fingerprint()
 
         return bundle
 
@@ -121,12 +594,21 @@ class RulePacker:
         if request.languages:
             filtered = self._filter_by_languages(filtered, request.languages)
 
-        # Filter deprecated rules unless explicitly allowed
-        if not request.include_deprecated:
-            filtered = [r for r in filtered if r.status != Status.DEPRECATED]
-
         return filtered
 
+    def _partition(
+        self, rules: list[RuleCard]
+    ) -> tuple[list[RuleCard], list[RuleCard]]:
+        """Split rules into (non-deprecated, deprecated) lists."""
+        active: list[RuleCard] = []
+        deprecated: list[RuleCard] = []
+        for rule in rules:
+            if rule.status == Status.DEPRECATED:
+                deprecated.append(rule)
+            else:
+                active.append(rule)
+        return active, deprecated
+
     def _filter_by_intent(
         self, rules: list[RuleCard], intent_tags: list[str] | None
     ) -> list[RuleCard]:
@@ -134,20 +616,8 @@ class RulePacker:
         if not intent_tags:
             return rules
 
-        filtered = []
-        for rule in rules:
-            # Debug: print what we're checking
-            print(
-                f"DEBUG: Checking rule {rule.id} with intent_tags "
-                f"{rule.intent_tags} against filter {intent_tags}"
-            )
-            if any(tag in rule.intent_tags for tag in intent_tags):
-                print(f"DEBUG: Rule {rule.id} matches!")
-                filtered.append(rule)
-            else:
-                print(f"DEBUG: Rule {rule.id} does not match")
-
-        return filtered
+        wanted = frozenset(intent_tags)
+        return [rule for rule in rules if not wanted.isdisjoint(rule.intent_tags)]
 
     def _filter_by_languages(
         self, rules: list[RuleCard], languages: list[str] | None
@@ -156,12 +626,8 @@ class RulePacker:
         if not languages:
             return rules
 
-        filtered = []
-        for rule in rules:
-            if any(lang in rule.scope.languages for lang in languages):
-                filtered.append(rule)
-
-        return filtered
+        wanted = frozenset(languages)
+        return [rule for rule in rules if not wanted.isdisjoint(rule.scope.languages)]
 
     def _sort_rules(self, rules: list[RuleCard]) -> list[RuleCard]:
         """Sort rules deterministically according to specification.
@@ -170,144 +636,253 @@ class RulePacker:
         (error>warning>info), version desc, id asc
         """
 
-        def sort_key(rule: RuleCard) -> tuple[int, int, int, str]:
-            return (
-                self._status_rank.get(rule.status, 999),  # status asc (active first)
-                self._severity_rank.get(
-                    rule.severity, 999
-                ),  # severity asc (error first)
-                -rule.version,  # version desc (higher versions first)
-                rule.id,  # id asc (alphabetical)
-            )
-
-        return sorted(rules, key=sort_key)
+        return sorted(rules, key=attrgetter("sort_key"))
 
-    def _collect_target_paths(self, request: PackRequest) -> list[Path]:
+    def _collect_target_paths(self, request: PackRequest) -> list[str]:
         """Collect target file paths constrained by PackRequest.file_globs."""
         path = Path(request.path)
 
-        if not path.exists():
+        # One stat answers exists/is_file/is_dir; missing paths end here
+        # without walking anything
+        try:
+            mode = path.stat().st_mode
+        except OSError:
             return []
 
-        if path.is_file():
-            return [path]
+        if stat.S_ISREG(mode):
+            return [str(path)]
 
-        if not path.is_dir():
+        if not stat.S_ISDIR(mode):
             return []
 
-        # Collect files recursively, respecting file_globs constraint
-        target_paths = []
-        file_globs = request.file_globs or [
-            "*"
-        ]  # Default to all files if no globs specified
-
-        for root, dirs, files in os.walk(path):
-            # Skip common directories to optimize
-            dirs[:] = [
-                d
-                for d in dirs
-                if not d.startswith(".")
-                and d
-                not in {
-                    "__pycache__",
-                    "node_modules",
-                    "build",
-                    "dist",
-                    ".git",
-                    "target",
-                }
-            ]
-
-            root_path = Path(root)
-            for file in files:
-                # Skip hidden files and common artifacts
-                if file.startswith(".") or file.endswith(
-                    (".pyc", ".pyo", ".tmp", ".log")
-                ):
-                    continue
-
-                file_path = root_path / file
-
-                # Check if file matches any of the specified globs
-                if any(fnmatch.fnmatch(str(file_path), glob) for glob in file_globs):
-                    target_paths.append(file_path)
+        # Collect files recursively, respecting file_globs constraint;
+        # without globs every file is a target
+        target_paths = _walk_target_files(str(path))
+        if request.file_globs:
+            glob_regex = _glob_union(tuple(request.file_globs))
+            normcase = os.path.normcase
+            target_paths = [p for p in target_paths if glob_regex.match(normcase(p))]
 
         return target_paths
 
     def _evaluate_rules(
-        self, rules: list[RuleCard], target_paths: list[Path]
+        self,
+        rules: list[RuleCard],
+        target_paths: list[str],
+        max_file_size: int | None = None,
     ) -> list[RuleMatch]:
         """Evaluate rules against target paths using scope → triggers
-        → detectors order."""
-        rule_matches = []
+        → detectors order.
 
-        for rule in rules:
-            rule_matched = False
-            triggered_by = []
-            detected_in = []
+        Regex detectors skip files larger than max_file_size bytes.
+        """
+        rule_matches: list[RuleMatch] = []
+        if not target_paths:
+            # Nothing to scan, so skip building matchers and stat'ing
+            # FILE_EXISTS paths
+            return rule_matches
+
+        # Scan each path once for every PATH_CONTAINS needle used by any
+        # trigger or detector, instead of once per rule
+        needle_matcher = _NeedleMatcher(
+            [
+                t.value
+                for r in rules
+                for t in r.triggers
+                if t.type == TriggerType.PATH_CONTAINS
+            ]
+            + [
+                d.value
+                for r in rules
+                for d in r.detectors
+                if d.type == DetectorType.PATH_CONTAINS and d.value
+            ]
+        )
+        # FILE_EXISTS checks do not depend on the scanned file, so stat each
+        # distinct path once per pack instead of once per rule per file
+        existing_paths = {
+            value
+            for value in {
+                t.value
+                for r in rules
+                for t in r.triggers
+                if t.type == TriggerType.FILE_EXISTS
+            }
+            | {
+                d.value
+                for r in rules
+                for d in r.detectors
+                if d.type == DetectorType.FILE_EXISTS and d.value
+            }
+            if Path(value).exists()
+        }
 
-            for target_path in target_paths:
-                # Step 1: Evaluate scope
-                if not self._matches_scope(rule, target_path):
-                    continue
+        # Required literals of regex detectors, found in each file with one
+        # automaton pass; only worthwhile when pyahocorasick is installed
+        literal_matcher = None
+        if ahocorasick is not None:
+            literals = [
+                literal
+                for r in rules
+                for d in r.detectors
+                if d.type == DetectorType.REGEX
+                and d.pattern
+                and (literal := _required_literal(d.pattern)) is not None
+            ]
+            if literals:
+                literal_matcher = _NeedleMatcher(literals)
+
+        # Regex detectors tested together with one RE2 set scan per file;
+        # only available when google-re2 is installed
+        pattern_set = None
+        if re2 is not None:
+            pattern_set = (
+                _PatternSet(
+                    d.pattern
+                    for r in rules
+                    for d in r.detectors
+                    if d.type == DetectorType.REGEX and d.pattern
+                )
+                or None
+            )
 
-                # Step 2: Evaluate triggers (ALL must match)
-                path_triggers = self._evaluate_triggers(rule, target_path)
-                if rule.triggers and not path_triggers:
-                    continue  # Triggers not satisfied
+        # Hoist per-path string work out of the rule loop
+        path_parts = [_path_parts(p) for p in target_paths]
+        path_needles: list[set[str] | None] = (
+            [needle_matcher.find(parts[0]) for parts in path_parts]
+            if needle_matcher
+            else [None] * len(target_paths)
+        )
 
-                # Step 3: Evaluate detectors (ANY can match)
-                detectors_matched, detections = self._evaluate_detectors(
-                    rule, target_path
-                )
-                if not detectors_matched:
-                    continue  # Detectors not satisfied
+        # Scan files independently; reads and regex searches over large
+        # buffers release the GIL, so larger trees are fanned out to threads
+        scan_file = partial(
+            self._scan_file,
+            rules,
+            literals=literal_matcher,
+            existing_paths=existing_paths,
+            max_file_size=max_file_size,
+            patterns=pattern_set,
+        )
+        if len(path_parts) >= _PARALLEL_SCAN_MIN_FILES:
+            max_workers = min(32, (os.cpu_count() or 1) * 2)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                per_file = list(executor.map(scan_file, path_parts, path_needles))
+        else:
+            per_file = list(map(scan_file, path_parts, path_needles))
+
+        for rule_idx, rule in enumerate(rules):
+            rule_matched = False
+            # Dedupe incrementally, keeping first-seen order so the
+            # resulting lists are deterministic
+            triggered_by: list[str] = []
+            triggered_seen: set[str] = set()
+            detected_in: list[str] = []
+            detected_seen: set[str] = set()
+
+            # Merge in file order so results match a sequential scan
+            for file_hits in per_file:
+                hit = file_hits.get(rule_idx)
+                if hit is None:
+                    continue
 
                 # Rule matched for this path
                 rule_matched = True
-                triggered_by.extend(path_triggers)
-                detected_in.extend(detections)
+                path_triggers, detections = hit
+                for trigger in path_triggers:
+                    if trigger not in triggered_seen:
+                        triggered_seen.add(trigger)
+                        triggered_by.append(trigger)
+                for detection in detections:
+                    if detection not in detected_seen:
+                        detected_seen.add(detection)
+                        detected_in.append(detection)
 
             if rule_matched:
-                # Remove duplicates and create RuleMatch
-                rule_match = RuleMatch(
+                rule_match = RuleMatch.model_construct(
                     rule=rule,
                     fingerprint=rule.compute_fingerprint(),
-                    triggered_by=list(set(triggered_by)),
-                    detected_in=list(set(detected_in)),
+                    triggered_by=triggered_by,
+                    detected_in=detected_in,
                 )
                 rule_matches.append(rule_match)
 
         return rule_matches
 
-    def _matches_scope(self, rule: RuleCard, target_path: Path) -> bool:
+    def _scan_file(
+        self,
+        rules: list[RuleCard],
+        parts: tuple[str, str, str],
+        path_needles: set[str] | None,
+        literals: _NeedleMatcher | None = None,
+        existing_paths: set[str] | None = None,
+        max_file_size: int | None = None,
+        patterns: _PatternSet | None = None,
+    ) -> dict[int, tuple[list[str], list[str]]]:
+        """Evaluate every rule against a single file.
+
+        Returns {rule index: (triggers, detections)} for the rules that
+        matched. Only reads its arguments, so it is safe to run in threads.
+        literals, when given, prefilters regex detectors by required literal;
+        existing_paths is the set of FILE_EXISTS values known to exist;
+        patterns, when given, tests the regex detectors it covers in one scan.
+        Files over max_file_size bytes are not read by regex detectors.
+        """
+        path_str, path_ext, path_name = parts
+        source = _FileSource(path_str, literals, max_file_size, patterns)
+        hits: dict[int, tuple[list[str], list[str]]] = {}
+
+        for rule_idx, rule in enumerate(rules):
+            # Step 1: Evaluate scope
+            if not self._matches_scope(rule, path_str, path_ext, path_name):
+                continue
+
+            # Step 2: Evaluate triggers (ALL must match)
+            path_triggers = self._evaluate_triggers(
+                rule, path_str, path_ext, path_name, path_needles, existing_paths
+            )
+            if rule.triggers and not path_triggers:
+                continue  # Triggers not satisfied
+
+            # Step 3: Evaluate detectors (ANY can match)
+            detectors_matched, detections = self._evaluate_detectors(
+                rule,
+                path_str,
+                path_ext,
+                path_name,
+                path_needles,
+                source,
+                existing_paths,
+            )
+            if not detectors_matched:
+                continue  # Detectors not satisfied
+
+            hits[rule_idx] = (path_triggers, detections)
+
+        return hits
+
+    def _matches_scope(
+        self, rule: RuleCard, path_str: str, path_ext: str, path_name: str
+    ) -> bool:
         """Check if rule matches the target path scope."""
         scope = rule.scope
 
         # Check repository patterns
         if scope.repo_patterns:
-            repo_match = False
-            for pattern in scope.repo_patterns:
-                if fnmatch.fnmatch(str(target_path), pattern):
-                    repo_match = True
-                    break
-            if not repo_match:
+            repo_regex = _glob_union(tuple(scope.repo_patterns))
+            if not repo_regex.match(os.path.normcase(path_str)):
                 return False
 
         # Check file globs
         if scope.file_globs:
-            file_match = False
-            for glob_pattern in scope.file_globs:
-                if fnmatch.fnmatch(str(target_path), glob_pattern):
-                    file_match = True
-                    break
-            if not file_match:
+            glob_regex = _glob_union(tuple(scope.file_globs))
+            if not glob_regex.match(os.path.normcase(path_str)):
                 return False
 
         # Check languages (basic extension matching)
         if scope.languages:
             lang_match = False
-            file_ext = target_path.suffix.lower()
+            file_ext = path_ext
             for lang in scope.languages:
                 lang_lower = lang.lower()
                 if lang_lower == "kotlin" and file_ext in [".kt", ".kts"]:
@@ -331,25 +906,59 @@ class RulePacker:
 
         return True
 
-    def _evaluate_triggers(self, rule: RuleCard, target_path: Path) -> list[str]:
+    def _evaluate_triggers(
+        self,
+        rule: RuleCard,
+        path_str: str,
+        path_ext: str,
+        path_name: str,
+        path_needles: set[str] | None = None,
+        existing_paths: set[str] | None = None,
+    ) -> list[str]:
         """Evaluate triggers for a rule. Returns list of matched
-        trigger descriptions."""
+        trigger descriptions.
+
+        path_needles, when given, is the precomputed set of PATH_CONTAINS
+        values found in path_str; existing_paths likewise holds the
+        FILE_EXISTS values that exist.
+        """
         matched_triggers = []
 
         for trigger in rule.triggers:
             if trigger.type == TriggerType.PATH_CONTAINS:
-                if trigger.value in str(target_path):
+                if (
+                    trigger.value in path_needles
+                    if path_needles is not None
+                    else trigger.value in path_str
+                ):
                     matched_triggers.append(f"path contains '{trigger.value}'")
             elif trigger.type == TriggerType.FILE_EXISTS:
-                if Path(trigger.value).exists():
+                if (
+                    trigger.value in existing_paths
+                    if existing_paths is not None
+                    else Path(trigger.value).exists()
+                ):
                     matched_triggers.append(f"file exists '{trigger.value}'")
 
         return matched_triggers
 
     def _evaluate_detectors(
-        self, rule: RuleCard, target_path: Path
+        self,
+        rule: RuleCard,
+        path_str: str,
+        path_ext: str,
+        path_name: str,
+        path_needles: set[str] | None = None,
+        source: _FileSource | None = None,
+        existing_paths: set[str] | None = None,
     ) -> tuple[bool, list[str]]:
-        """Evaluate detectors for a rule. Returns (matched, detection_descriptions)."""
+        """Evaluate detectors for a rule. Returns (matched, detection_descriptions).
+
+        path_needles, when given, is the precomputed set of PATH_CONTAINS
+        values found in path_str. source, when given, shares the file's
+        contents (and literal prefilter) across rules; existing_paths holds
+        the FILE_EXISTS values that exist.
+        """
         if not rule.detectors:
             return True, []  # No detectors means always match
 
@@ -359,36 +968,49 @@ class RulePacker:
             try:
                 if detector.type == DetectorType.REGEX and detector.pattern:
                     # Check file glob constraint if specified
-                    if detector.file_glob and not fnmatch.fnmatch(
-                        str(target_path), detector.file_glob
-                    ):
+                    if detector.file_glob and not _glob_union(
+                        (detector.file_glob,)
+                    ).match(os.path.normcase(path_str)):
                         continue  # File doesn't match the glob
 
-                    # Read file content and search for pattern
-                    with open(target_path, encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
+                    if source is None:
+                        source = _FileSource(path_str)
+                    if not source.may_match(detector.pattern):
+                        continue  # A required literal is missing
+
+                    content = source.content
+                    if content is None:
+                        continue  # Over the size limit; not scanned
 
-                    # Search line by line for better performance and context
-                    lines = content.splitlines()
-                    for line_num, line in enumerate(lines, 1):
-                        if re.search(detector.pattern, line):
-                            detection_matches.append(
-                                f"regex '{detector.pattern}' found in "
-                                f"{target_path.name}:{line_num}"
-                            )
-                            break  # Found match, no need to check other lines
+                    line_num = _find_pattern_line(content, detector.pattern)
+                    if line_num is not None:
+                        detection_matches.append(
+                            f"regex '{detector.pattern}' found in "
+                            f"{path_name}:{line_num}"
+                        )
 
                 elif detector.type == DetectorType.FILE_EXISTS and detector.value:
-                    if Path(detector.value).exists():
+                    if (
+                        detector.value in existing_paths
+                        if existing_paths is not None
+                        else Path(detector.value).exists()
+                    ):
                         detection_matches.append(f"file exists '{detector.value}'")
 
                 elif detector.type == DetectorType.PATH_CONTAINS and detector.value:
-                    if detector.value in str(target_path):
+                    if (
+                        detector.value in path_needles
+                        if path_needles is not None
+                        else detector.value in path_str
+                    ):
                         detection_matches.append(f"path contains '{detector.value}'")
 
             except (FileNotFoundError, OSError, UnicodeDecodeError):
                 # Skip files that can't be read
                 continue
+            except re.error:
+                # Invalid patterns never match; validate reports them
+                continue
 
         # Return True if any detector matched (ANY logic)
         return len(detection_matches) > 0, detection_matches
@@ -420,36 +1042,17 @@ class RulePacker:
 
     def _build_actions_summary(self, rule_matches: list[RuleMatch]) -> dict[str, Any]:
         """Build summary of actions from matched rules."""
-        summary: dict[str, Any] = {
+        # Count the values as given; each distinct key is turned into a plain
+        # string once, whether it is an enum member or already a string
+        action_types = Counter(match.rule.action.type for match in rule_matches)
+        severities = Counter(match.rule.severity for match in rule_matches)
+        domains = Counter(match.rule.domain for match in rule_matches)
+
+        return {
             "total_actions": len(rule_matches),
-            "action_types": {},
-            "severities": {},
-            "domains": {},
+            "action_types": {
+                getattr(k, "value", k): v for k, v in action_types.items()
+            },
+            "severities": {getattr(k, "value", k): v for k, v in severities.items()},
+            "domains": dict(domains),
         }
-
-        for match in rule_matches:
-            rule = match.rule
-
-            # Count action types
-            action_type = (
-                rule.action.type.value
-                if hasattr(rule.action.type, "value")
-                else str(rule.action.type)
-            )
-            action_types: dict[str, int] = summary["action_types"]
-            action_types[action_type] = action_types.get(action_type, 0) + 1
-
-            # Count severities
-            severity = (
-                rule.severity.value
-                if hasattr(rule.severity, "value")
-                else str(rule.severity)
-            )
-            severities: dict[str, int] = summary["severities"]
-            severities[severity] = severities.get(severity, 0) + 1
-
-            # Count domains
-            domains: dict[str, int] = summary["domains"]
-            domains[rule.domain] = domains.get(rule.domain, 0) + 1
-
-        return summary
@@ -2,163 +2,535 @@
 
 from __future__ import annotations
 
+import mmap
 import os
+import re
+import stat
 import tempfile
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 import ruamel.yaml
+import yaml
 from pydantic import ValidationError
 
-from ..models import RuleCard
+from ..models import DetectorType, RuleCard
+
+# libyaml C parser when PyYAML was built with it, pure Python otherwise
+_BaseLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Implicit tags PyYAML resolves by YAML 1.1 rules, replaced below by the
+# YAML 1.2 core schema patterns that ruamel.yaml writes against
+_YAML11_TAGS = frozenset(
+    {"tag:yaml.org,2002:bool", "tag:yaml.org,2002:int", "tag:yaml.org,2002:float"}
+)
+
+
+class _RuleLoader(_BaseLoader):  # type: ignore[misc,valid-type]
+    """Safe loader for rule cards that resolves scalars like YAML 1.2.
+
+    ruamel.yaml writes cards as YAML 1.2, where plain scalars such as
+    ``yes``/``no``/``on``/``off`` or ``1:30`` are strings rather than
+    booleans or sexagesimal numbers, and ``010`` is decimal, not octal.
+    """
+
+    yaml_implicit_resolvers = {
+        key: [(tag, regexp) for tag, regexp in resolvers if tag not in _YAML11_TAGS]
+        for key, resolvers in _BaseLoader.yaml_implicit_resolvers.items()
+    }
+
+
+def _construct_yaml12_int(loader: _RuleLoader, node: yaml.ScalarNode) -> int:
+    """Build an int from a YAML 1.2 core schema scalar (decimal, 0o, 0x)."""
+    value = loader.construct_scalar(node)
+    if value.startswith(("0o", "0x")):
+        return int(value, 0)
+    return int(value)
+
+
+_RuleLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:bool",
+    re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"),
+    list("tTfF"),
+)
+_RuleLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:int",
+    re.compile(r"^(?:[-+]?[0-9]+|0o[0-7]+|0x[0-9a-fA-F]+)$"),
+    list("-+0123456789"),
+)
+_RuleLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:float",
+    re.compile(
+        r"""^(?:[-+]?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)(?:[eE][-+]?[0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""",
+        re.X,
+    ),
+    list("-+.0123456789"),
+)
+_RuleLoader.add_constructor("tag:yaml.org,2002:int", _construct_yaml12_int)
+
+# Shared writer for saving cards; building a YAML instance sets up its own
+# resolver and representer tables, so it is done once per process
+_YAML_WRITER = ruamel.yaml.YAML()
+_YAML_WRITER.preserve_quotes = True
+_YAML_WRITER.indent(mapping=2, sequence=4, offset=2)
+_YAML_WRITER_LOCK = threading.Lock()
+
+# Domain part of a rule ID (RULE-<domain>-<slug>)
+_RULE_ID_RE = re.compile(r"RULE-([^-]*)-")
+
+# Doc URL prefixes that point at files in the project
+_LOCAL_REF_PREFIXES = ("./", "../")
+
+# Card files larger than this are parsed from a memory map
+_MMAP_MIN_SIZE = 64 * 1024
+
+# Below this many files the thread pool costs more than it saves
+_PARALLEL_LOAD_MIN_FILES = 32
+
+# Errors raised while reading or parsing a rule card file
+_LOAD_ERRORS = (
+    OSError,
+    ValidationError,
+    yaml.YAMLError,
+)
+
+
+# A quantifier: *, +, ?, {n}, {n,}, {,m} or {n,m}, then a lazy/possessive suffix
+_QUANTIFIER_RE = re.compile(r"([*+?]|\{(\d*)(,?)(\d*)\})([?+]?)")
+
+# The prefix of a group that does not capture its body as-is: (?:, (?P<x>, ...
+_GROUP_PREFIX_RE = re.compile(r"\(\?(?:P<\w+>|<[=!]|[:=!>]|[aiLmsux-]+:?)")
+
+
+@lru_cache(maxsize=1024)
+def _regex_compile_error(pattern: str) -> str | None:
+    """Return why a detector pattern does not compile, or None if it does."""
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        return f"Invalid regex pattern '{pattern}': {e}"
+    return None
+
+
+def _matches_char(atom: str, char: str) -> bool:
+    """Whether a regex atom can match a single character (True if unsure)."""
+    try:
+        return re.fullmatch(atom, char) is not None
+    except re.error:
+        return True
+
+
+@lru_cache(maxsize=1024)
+def _has_nested_unbounded_repeat(pattern: str) -> bool:
+    """Whether a pattern repeats a group that holds an unbounded repeat.
+
+    Patterns like (a+)+ or (\\w*\\s*)* can backtrack exponentially on
+    input that almost matches. Possessive repeats and atomic groups never
+    backtrack, and a group whose single repeat is closed off by a literal
+    the repeat cannot match, like (\\w+\\.)*, splits its input only one
+    way, so none of these are flagged.
+    """
+    # Per open group: where it starts, whether it is atomic or has
+    # alternatives, how many unbounded repeats it holds, the atom of its
+    # last top-level repeat, and whether a literal that atom cannot match
+    # has closed it off
+    frames: list[dict[str, Any]] = [
+        {
+            "start": 0,
+            "atomic": False,
+            "branches": False,
+            "repeats": 0,
+            "last": None,
+            "guarded": False,
+        }
+    ]
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        start = i
+        group = None
+        literal = None
+        if char == "(":
+            prefix = _GROUP_PREFIX_RE.match(pattern, i)
+            frames.append(
+                {
+                    "start": i,
+                    "atomic": pattern.startswith("(?>", i),
+                    "branches": False,
+                    "repeats": 0,
+                    "last": None,
+                    "guarded": False,
+                }
+            )
+            i = prefix.end() if prefix else i + 1
+            continue
+        if char == "|":
+            # Alternation can split input several ways; never treat it as safe
+            frames[-1]["last"] = None
+            frames[-1]["guarded"] = False
+            frames[-1]["branches"] = True
+            i += 1
+            continue
+        if char == ")":
+            if len(frames) == 1:
+                return False  # Unbalanced; compiling reports it
+            group = frames.pop()
+            start = group["start"]
+            i += 1
+        elif char == "\\":
+            escaped = pattern[i + 1 : i + 2]
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            i += 2
+        elif char == "[":
+            i += 1
+            if pattern.startswith("^", i):
+                i += 1
+            if pattern.startswith("]", i):
+                i += 1
+            while i < n and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        else:
+            if char not in ".^$":
+                literal = char
+            i += 1
+
+        frame = frames[-1]
+        atom = pattern[start:i]
+        quantifier = _QUANTIFIER_RE.match(pattern, i)
+        unbounded = False
+        if quantifier:
+            kind, _, comma, upper, suffix = quantifier.groups()
+            i = quantifier.end()
+            literal = None
+            unbounded = suffix != "+" and (
+                kind in "*+" or (kind[0] == "{" and bool(comma) and not upper)
+            )
+
+        if group is not None and not group["atomic"]:
+            inner = group["repeats"]
+            safe = inner == 1 and group["guarded"] and not group["branches"]
+            if unbounded and inner and not safe:
+                return True
+            frame["repeats"] += inner
+        if unbounded:
+            frame["repeats"] += 1
+            frame["last"] = atom
+            frame["guarded"] = False
+        elif literal is not None and frame["last"] is not None:
+            frame["guarded"] = not _matches_char(frame["last"], literal)
+            frame["last"] = None
+        else:
+            frame["last"] = None
+    return False
+
+
+def _check_script(script_path: str) -> tuple[bool, bool, bool]:
+    """Return (exists, executable, is_file) for a resolved script path.
+
+    One stat answers exists and is_file; the access check is cached on the
+    file's mtime and mode, so a created, replaced or chmod'ed script is
+    always seen as it is now.
+    """
+    try:
+        st = os.stat(script_path)
+    except OSError:
+        return False, False, False
+    return (
+        True,
+        _is_executable(script_path, st.st_mtime_ns, st.st_mode),
+        stat.S_ISREG(st.st_mode),
+    )
+
+
+@lru_cache(maxsize=256)
+def _is_executable(script_path: str, mtime_ns: int, mode: int) -> bool:
+    """Return whether script_path is executable; mtime and mode key the cache."""
+    return os.access(script_path, os.X_OK)
+
+
+def _iter_yaml_entries(
+    root: Path | str, recursive: bool = True
+) -> Iterator[os.DirEntry[str]]:
+    """Yield directory entries of all ``*.yaml`` files below root.
+
+    Walks with os.scandir so file types come from the cached directory
+    entries instead of a stat per path. Symlinked directories are not
+    followed, which also rules out symlink loops. A missing root yields
+    nothing, so callers need no separate exists() probe.
+    """
+    pending = deque([os.fspath(root)])
+    while pending:
+        try:
+            entries = os.scandir(pending.popleft())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.name.endswith(".yaml"):
+                    yield entry
+
+
+def _stat_entry(entry: os.DirEntry[str]) -> os.stat_result | None:
+    """Stat a directory entry, or return None to leave the error to the read."""
+    try:
+        return entry.stat()
+    except OSError:
+        return None
+
+
+def _read_file(path: Path | str, size: int) -> bytes:
+    """Read a whole file with a single read sized from its stat result.
+
+    Asks for one byte more than size so a file that grew since the stat
+    is still read to the end.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        data = os.read(fd, size + 1)
+        if len(data) > size:
+            # The file grew since the stat; read the rest
+            chunks = [data]
+            while chunk := os.read(fd, 1 << 16):
+                chunks.append(chunk)
+            data = b"".join(chunks)
+    finally:
+        os.close(fd)
+    return data
+
+
+def _load_yaml(path: Path | str, size: int) -> Any:
+    """Parse a YAML file with the C-accelerated safe loader.
+
+    Large files are memory-mapped and streamed to the parser in chunks
+    instead of being copied into one bytes object first.
+    """
+    if size > _MMAP_MIN_SIZE:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            return yaml.load(mapped, Loader=_RuleLoader)
+
+    return yaml.load(_read_file(path, size), Loader=_RuleLoader)
 
 
 class FileSystemStorage:
     """File system-based storage for rule cards."""
 
-    def __init__(self, root: Path):
-        """Initialize storage with root path."""
+    def __init__(
+        self, root: Path, durable_writes: bool = False, atomic_writes: bool = True
+    ):
+        """Initialize storage with root path.
+
+        Args:
+            root: Registry root directory
+            durable_writes: fsync each saved card before it replaces the old file
+            atomic_writes: Save through a temporary file and rename; when
+                False cards are written in place, which is cheaper but can
+                leave a torn file if the write is interrupted
+        """
         self.root_path = Path(root)
-        self.yaml = ruamel.yaml.YAML()
-        self.yaml.preserve_quotes = True
-        self.yaml.indent(mapping=2, sequence=4, offset=2)
+        self.durable_writes = durable_writes
+        self.atomic_writes = atomic_writes
+
+        # Domain directories already created, so mkdir runs once per domain
+        self._known_dirs: set[Path] = set()
+
+        # Parsed cards keyed by path, with the (mtime_ns, size) they were
+        # read at; unchanged files are served without touching YAML again
+        self._cache: dict[str, tuple[int, int, RuleCard]] = {}
+
+        # ruamel.yaml is only used for writing, to keep the card layout
+        self.yaml = _YAML_WRITER
 
     def load_all_cards(self) -> list[RuleCard]:
         """Load all rule cards from storage, parse YAML, and normalize."""
         cards: list[RuleCard] = []
 
-        if not self.root_path.exists():
-            return cards
+        entries = list(_iter_yaml_entries(self.root_path))
+        yaml_files = [entry.path for entry in entries]
 
-        for yaml_file in self.root_path.rglob("*.yaml"):
-            try:
-                with open(yaml_file, encoding="utf-8") as f:
-                    data = self.yaml.load(f)
+        # Stat every file first, then read in inode order, which follows the
+        # on-disk layout closely enough to help readahead
+        stats = [_stat_entry(entry) for entry in entries]
+        inodes = [st.st_ino if st is not None else -1 for st in stats]
+        read_order = sorted(range(len(entries)), key=inodes.__getitem__)
 
-                if data is None:
-                    continue
+        def load(i: int) -> tuple[RuleCard | None, Exception | None]:
+            return self._load_card(yaml_files[i], stats[i])
 
-                # Validate and create RuleCard
-                rule = RuleCard(**data)
-
-                # Call normalize() as required
-                rule = rule.normalize()
+        # Opening and reading files blocks on I/O, so larger registries are
+        # fanned out to threads
+        if len(entries) >= _PARALLEL_LOAD_MIN_FILES:
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                loaded = list(executor.map(load, read_order))
+        else:
+            loaded = list(map(load, read_order))
 
-                cards.append(rule)
+        # Report and return cards in walk order, whatever order they were read
+        results = dict(zip(read_order, loaded, strict=True))
 
-            except (
-                OSError,
-                FileNotFoundError,
-                ValidationError,
-                ruamel.yaml.constructor.ConstructorError,
-                ruamel.yaml.parser.ParserError,
-                ruamel.yaml.scanner.ScannerError,
-            ) as e:
+        for i, yaml_file in enumerate(yaml_files):
+            rule, error = results[i]
+            if error is not None:
                 # Log error but continue processing other files
-                print(f"Error loading {yaml_file}: {e}")
-                continue
+                print(f"Error loading {yaml_file}: {error}")
+            elif rule is not None:
+                cards.append(rule)
 
         return cards
 
-    def save_card(self, card: RuleCard) -> None:
-        """Save a rule card to storage with atomic write."""
-        rule_path = self._get_rule_path(card.id)
+    def _load_card(
+        self, yaml_file: str, st: os.stat_result | None = None
+    ) -> tuple[RuleCard | None, Exception | None]:
+        """Load and normalize one card, returning (card, error) for a file."""
+        try:
+            rule = self._parse_card(yaml_file, st)
+        except _LOAD_ERRORS as e:
+            return None, e
+
+        # Call normalize() as required, unless the card is already normalized
+        if rule is not None and not rule.is_normalized:
+            rule = rule.normalize()
+        return rule, None
+
+    def _parse_card(
+        self, path: Path | str, st: os.stat_result | None = None
+    ) -> RuleCard | None:
+        """Parse a card file, reusing the cached card if the file is unchanged.
+
+        Takes the file's stat result when the caller already has one.
+        Returns a fresh deep copy so callers can normalize or modify it,
+        including its nested lists and models, without touching the cache.
+        """
+        key = os.fspath(path)
+        if st is None:
+            st = os.stat(key)
+        cached = self._cache.get(key)
+        if (
+            cached is not None
+            and cached[0] == st.st_mtime_ns
+            and cached[1] == st.st_size
+        ):
+            return cached[2].model_copy(deep=True)
 
-        # Convert to dict and serialize to YAML
-        card_dict = card.model_dump(exclude_unset=True)
-
-        # Convert enum values to strings for YAML serialization
-        def convert_enums(obj: Any) -> Any:
-            if isinstance(obj, dict):
-                return {k: convert_enums(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_enums(item) for item in obj]
-            elif hasattr(obj, "value"):  # Enum
-                return obj.value
-            else:
-                return obj
+        data = _load_yaml(key, st.st_size)
+
+        if data is None:
+            return None
 
-        serializable_dict = convert_enums(card_dict)
+        # Validate and create RuleCard
+        rule = RuleCard.model_validate(data)
+        self._cache[key] = (st.st_mtime_ns, st.st_size, rule)
+        return rule.model_copy(deep=True)
 
-        # Create YAML string
-        from io import StringIO
+    def save_card(self, card: RuleCard) -> None:
+        """Save a rule card to storage, atomically unless disabled."""
+        rule_path = self._get_rule_path(card.id)
 
-        stream = StringIO()
-        self.yaml.dump(serializable_dict, stream)
-        yaml_str = stream.getvalue()
+        # Convert to a dict of plain JSON types (enums become their values)
+        serializable_dict = card.model_dump(mode="json", exclude_unset=True)
 
-        # Atomic write
-        self._atomic_write(rule_path, yaml_str)
+        def write(stream: BinaryIO) -> None:
+            self._dump_yaml(serializable_dict, stream)
+
+        self._cache.pop(os.fspath(rule_path), None)
+        if self.atomic_writes:
+            # Atomic write, serializing straight into the temporary file
+            self._atomic_write_with(rule_path, write)
+        else:
+            # Direct write: one open/write/close, no temporary file or rename
+            with open(rule_path, "wb") as f:
+                write(f)
+                if self.durable_writes:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _dump_yaml(self, data: dict[str, Any], stream: BinaryIO) -> None:
+        """Dump data as YAML; the shared writer is not safe to use concurrently."""
+        with _YAML_WRITER_LOCK:
+            self.yaml.dump(data, stream)
 
     def list_paths(self) -> list[Path]:
         """List all YAML file paths in storage."""
-        if not self.root_path.exists():
-            return []
-
-        return list(self.root_path.rglob("*.yaml"))
+        return [Path(entry.path) for entry in _iter_yaml_entries(self.root_path)]
 
     def _get_rule_path(self, rule_id: str) -> Path:
         """Get the file path for a rule ID."""
         # Parse domain from rule ID (RULE-<domain>-<slug>)
-        parts = rule_id.split("-")
-        if len(parts) < 3 or parts[0] != "RULE":
+        match = _RULE_ID_RE.match(rule_id)
+        if match is None:
             raise ValueError(f"Invalid rule ID format: {rule_id}")
 
-        domain = parts[1]
+        domain = match.group(1)
         domain_dir = self.root_path / domain
-        domain_dir.mkdir(parents=True, exist_ok=True)
+        if domain_dir not in self._known_dirs:
+            domain_dir.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(domain_dir)
 
         return domain_dir / f"{rule_id}.yaml"
 
-    def _atomic_write(self, path: Path, content: str) -> None:
-        """Write content to file atomically."""
+    def _atomic_write_with(
+        self, path: Path, writer: Callable[[BinaryIO], None]
+    ) -> None:
+        """Write a file atomically by passing a binary stream to writer."""
         # Create temporary file in same directory
         temp_fd = None
         temp_path = None
 
         try:
-            # Create temporary file
-            temp_fd, temp_path_str = tempfile.mkstemp(
-                dir=path.parent, prefix=f"{path.name}.tmp.", suffix=".tmp"
-            )
-            temp_path = Path(temp_path_str)
+            # Create temporary file, recreating the directory if it was
+            # removed after _get_rule_path saw it
+            try:
+                temp_fd, temp_path = tempfile.mkstemp(
+                    dir=path.parent, prefix=f"{path.name}.tmp.", suffix=".tmp"
+                )
+            except FileNotFoundError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temp_fd, temp_path = tempfile.mkstemp(
+                    dir=path.parent, prefix=f"{path.name}.tmp.", suffix=".tmp"
+                )
 
             # Write content to temporary file
-            with os.fdopen(temp_fd, "w", encoding="utf-8") as f:
-                f.write(content)
-                f.flush()
-                os.fsync(f.fileno())  # Force write to disk
-
-            temp_fd = None  # Don't close again in finally
+            with os.fdopen(temp_fd, "wb") as f:
+                temp_fd = None  # Closed by the file object
+                writer(f)
+                if self.durable_writes:
+                    f.flush()
+                    os.fsync(f.fileno())  # Force write to disk
 
             # Atomic rename
-            temp_path.replace(path)
+            os.replace(temp_path, path)
+            temp_path = None
 
         finally:
             if temp_fd is not None:
                 os.close(temp_fd)
-            if temp_path and temp_path.exists():
-                temp_path.unlink(missing_ok=True)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
 
-    def _load_rule_from_file(self, path: Path) -> RuleCard | None:
+    def _load_rule_from_file(self, path: Path | str) -> RuleCard | None:
         """Load a rule card from a YAML file."""
         try:
-            with open(path, encoding="utf-8") as f:
-                data = self.yaml.load(f)
-
-            if data is None:
-                return None
-
-            # Validate and create RuleCard
-            rule = RuleCard(**data)
-            return rule
+            return self._parse_card(path)
 
         except (
             FileNotFoundError,
             ValidationError,
-            ruamel.yaml.constructor.ConstructorError,
-            ruamel.yaml.parser.ParserError,
-            ruamel.yaml.scanner.ScannerError,
+            yaml.YAMLError,
         ):
             return None
 
@@ -168,23 +540,15 @@ class FileSystemStorage:
 
         if domain:
             # List rules from specific domain
-            domain_dir = self.root_path / domain
-            if not domain_dir.exists():
-                return []
-
-            for yaml_file in domain_dir.glob("*.yaml"):
-                rule = self._load_rule_from_file(yaml_file)
-                if rule:
-                    rules.append(rule)
+            entries = _iter_yaml_entries(self.root_path / domain, recursive=False)
         else:
             # List all rules from all domains
-            if not self.root_path.exists():
-                return []
+            entries = _iter_yaml_entries(self.root_path)
 
-            for yaml_file in self.root_path.rglob("*.yaml"):
-                rule = self._load_rule_from_file(yaml_file)
-                if rule:
-                    rules.append(rule)
+        for entry in entries:
+            rule = self._load_rule_from_file(entry.path)
+            if rule:
+                rules.append(rule)
 
         return rules
 
@@ -197,26 +561,51 @@ class FileSystemStorage:
         """Delete a rule card by ID. Returns True if deleted."""
         rule_path = self._get_rule_path(rule_id)
 
+        self._cache.pop(os.fspath(rule_path), None)
+
         if rule_path.exists():
             rule_path.unlink()
             return True
 
         return False
 
-    def validate_rule(self, rule: RuleCard) -> list[str]:
-        """Validate a rule card. Returns list of validation errors."""
+    def validate_rule(
+        self,
+        rule: RuleCard,
+        *,
+        existing_rules_by_id: dict[str, RuleCard] | None = None,
+        local_references: dict[str, bool] | None = None,
+    ) -> list[str]:
+        """Validate a rule card. Returns list of validation errors.
+
+        Args:
+            rule: Rule card to validate
+            existing_rules_by_id: Already loaded rules keyed by ID, used for
+                the duplicate check instead of reading the rule's file again
+            local_references: Existence of local doc references, as returned
+                by check_local_references(), used instead of a stat per rule
+        """
         errors = []
 
         # Check for duplicate IDs
-        existing_rule = self.get_rule(rule.id)
+        if existing_rules_by_id is not None:
+            existing_rule = existing_rules_by_id.get(rule.id)
+        else:
+            existing_rule = self.get_rule(rule.id)
         if existing_rule and existing_rule != rule:
             errors.append(f"Rule with ID '{rule.id}' already exists")
 
         # Validate references exist (if they point to local docs)
         for ref in rule.references:
-            if ref.doc_url.startswith("./") or ref.doc_url.startswith("../"):
-                doc_path = self.root_path.parent / ref.doc_url
-                if not doc_path.exists():
+            if ref.doc_url.startswith(_LOCAL_REF_PREFIXES):
+                exists = (
+                    local_references.get(ref.doc_url)
+                    if local_references is not None
+                    else None
+                )
+                if exists is None:
+                    exists = self._local_reference_exists(ref.doc_url)
+                if not exists:
                     errors.append(f"Referenced documentation not found: {ref.doc_url}")
 
         # Validate action consistency
@@ -226,22 +615,66 @@ class FileSystemStorage:
         if rule.action.type == "manual" and not rule.action.steps:
             errors.append("Manual actions must have steps")
 
+        # Validate regex detectors compile
+        for detector in rule.detectors:
+            if detector.type == DetectorType.REGEX and detector.pattern:
+                pattern_error = _regex_compile_error(detector.pattern)
+                if pattern_error is not None:
+                    errors.append(pattern_error)
+
         # Enhanced script permission check
         if rule.action.type == "script" and rule.action.fix_command:
             self._validate_script_permissions(rule.action.fix_command, errors)
 
         return errors
 
+    def rule_warnings(self, rule: RuleCard) -> list[str]:
+        """Return problems in a rule card that do not make it invalid."""
+        warnings = []
+
+        # Flag regex detectors that may backtrack exponentially
+        for detector in rule.detectors:
+            if (
+                detector.type == DetectorType.REGEX
+                and detector.pattern
+                and _regex_compile_error(detector.pattern) is None
+                and _has_nested_unbounded_repeat(detector.pattern)
+            ):
+                warnings.append(
+                    f"Regex pattern '{detector.pattern}' nests unbounded "
+                    "quantifiers and may backtrack catastrophically"
+                )
+
+        return warnings
+
+    def check_local_references(self, rules: Iterable[RuleCard]) -> dict[str, bool]:
+        """Check each distinct local doc reference in rules once.
+
+        Returns a map of doc URL to whether the file exists, for passing to
+        validate_rule() across a whole validate pass.
+        """
+        doc_urls = {
+            ref.doc_url
+            for rule in rules
+            for ref in rule.references
+            if ref.doc_url.startswith(_LOCAL_REF_PREFIXES)
+        }
+        return {url: self._local_reference_exists(url) for url in doc_urls}
+
+    def _local_reference_exists(self, doc_url: str) -> bool:
+        """Return whether a local doc reference exists under the project root."""
+        return os.path.exists(os.path.join(self.root_path.parent, doc_url))
+
     def _validate_script_permissions(self, fix_command: str, errors: list[str]) -> None:
         """Validate script permissions for fix_command."""
         try:
             # Extract the script path from command (first argument before any options)
-            command_parts = fix_command.strip().split()
-            if not command_parts:
+            stripped = fix_command.strip()
+            if not stripped:
                 errors.append("Script fix_command cannot be empty")
                 return
 
-            script_path_str = command_parts[0]
+            script_path_str = stripped.split(None, 1)[0]
 
             # Convert to Path and resolve
             if script_path_str.startswith("./") or script_path_str.startswith("../"):
@@ -251,17 +684,19 @@ class FileSystemStorage:
                 # Absolute path
                 script_path = Path(script_path_str).resolve()
 
+            exists, executable, is_file = _check_script(str(script_path))
+
             # Check if script exists
-            if not script_path.exists():
+            if not exists:
                 errors.append(f"Script file not found: {script_path}")
                 return
 
             # Check if script is executable
-            if not os.access(script_path, os.X_OK):
+            if not executable:
                 errors.append(f"Script is not executable: {script_path}")
 
             # Additional check: ensure it's a regular file (not a directory)
-            if not script_path.is_file():
+            if not is_file:
                 errors.append(f"Script path is not a regular file: {script_path}")
 
         except (OSError, ValueError) as e:
@@ -271,28 +706,18 @@ class FileSystemStorage:
         """Validate all YAML files in storage. Returns list of file errors."""
         errors: list[str] = []
 
-        if not self.root_path.exists():
-            return errors
-
-        for yaml_file in self.root_path.rglob("*.yaml"):
+        for entry in _iter_yaml_entries(self.root_path):
+            yaml_file = entry.path
             try:
-                with open(yaml_file, encoding="utf-8") as f:
-                    data = self.yaml.load(f)
+                data = _load_yaml(yaml_file, entry.stat().st_size)
 
                 if data is None:
                     continue
 
                 # Try to create RuleCard to validate structure
-                RuleCard(**data)
-
-            except (
-                OSError,
-                FileNotFoundError,
-                ValidationError,
-                ruamel.yaml.constructor.ConstructorError,
-                ruamel.yaml.parser.ParserError,
-                ruamel.yaml.scanner.ScannerError,
-            ) as e:
+                RuleCard.model_validate(data)
+
+            except _LOAD_ERRORS as e:
                 errors.append(f"Invalid file {yaml_file}: {e}")
 
         return errors
@@ -1,8 +1,8 @@
 """Tests for Graphiti export functionality."""
 
+import hashlib
 import json
-import tempfile
-from pathlib import Path
+from itertools import islice
 
 import pytest
 
@@ -19,7 +19,7 @@ from hermezos.models import (
 )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_rule():
     """Create a sample rule card for testing."""
     return RuleCard(
@@ -41,167 +41,163 @@ def sample_rule():
     )
 
 
-def test_graphiti_export_creates_files(sample_rule):
-    """Test that Graphiti export creates nodes.jsonl and edges.jsonl files."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        export_path = Path(temp_dir) / "graph"
-
-        # Create index in export_only mode
-        index = GraphitiIndex(mode="export_only", export_path=export_path)
+def _read_jsonl(path, limit=None):
+    """Parse a JSONL file, optionally stopping after the first `limit` lines."""
+    if limit is None:
+        return [json.loads(line) for line in path.read_bytes().splitlines() if line]
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in islice(f, limit)]
 
-        # Upsert a rule
-        index.upsert_card(sample_rule)
 
-        # Close to trigger export
-        index.close()
+@pytest.fixture(scope="module")
+def exported_graph(tmp_path_factory, sample_rule):
+    """Export sample_rule once; tests only read the resulting directory."""
+    export_path = tmp_path_factory.mktemp("graph")
+    index = GraphitiIndex(mode="export_only", export_path=export_path)
+    index.upsert_card(sample_rule)
+    index.close()
+    return export_path
 
-        # Check that files were created
-        nodes_file = export_path / "nodes.jsonl"
-        edges_file = export_path / "edges.jsonl"
 
-        assert nodes_file.exists()
-        assert edges_file.exists()
+def test_graphiti_export_creates_files(exported_graph):
+    """Test that Graphiti export creates nodes.jsonl and edges.jsonl files."""
+    assert (exported_graph / "nodes.jsonl").exists()
+    assert (exported_graph / "edges.jsonl").exists()
 
 
-def test_graphiti_export_stable_output(sample_rule):
+def test_graphiti_export_stable_output(sample_rule, tmp_path):
     """Test that Graphiti export produces stable, sorted output across runs."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        export_path = Path(temp_dir) / "graph"
+    digests = []
+    for run in ("first", "second"):
+        index = GraphitiIndex(mode="export_only", export_path=tmp_path / run)
+        index.upsert_card(sample_rule)
+        index.close()
+        digests.append(index.output_digest)
 
-        # First export
-        index1 = GraphitiIndex(mode="export_only", export_path=export_path)
-        index1.upsert_card(sample_rule)
-        index1.close()
+    assert digests[0] is not None
+    assert digests[0] == digests[1]
 
-        # Read first export
-        nodes_file = export_path / "nodes.jsonl"
-        edges_file = export_path / "edges.jsonl"
+    # The digest covers exactly the serialized nodes followed by the edges
+    expected = hashlib.blake2b(digest_size=16)
+    expected.update(index._serialize_nodes())
+    expected.update(index._serialize_edges())
+    assert digests[0] == expected.digest()
 
-        with open(nodes_file) as f:
-            nodes1 = f.read()
-        with open(edges_file) as f:
-            edges1 = f.read()
 
-        # Second export (clean directory)
-        nodes_file.unlink()
-        edges_file.unlink()
+def test_graphiti_export_content_structure(exported_graph):
+    """Test that exported JSONL has correct structure and content."""
+    # Read and parse nodes
+    nodes = _read_jsonl(exported_graph / "nodes.jsonl")
 
-        index2 = GraphitiIndex(mode="export_only", export_path=export_path)
-        index2.upsert_card(sample_rule)
-        index2.close()
+    # Should have rule, domain, intent tags, and doc nodes
+    node_types = {node["type"] for node in nodes}
+    expected_types = {"RuleCard", "Domain", "IntentTag", "Doc"}
+    assert expected_types.issubset(node_types)
 
-        # Read second export
-        with open(nodes_file) as f:
-            nodes2 = f.read()
-        with open(edges_file) as f:
-            edges2 = f.read()
+    # Check rule card node
+    rule_nodes = [n for n in nodes if n["type"] == "RuleCard"]
+    assert len(rule_nodes) == 1
+    rule_node = rule_nodes[0]
+    assert rule_node["id"] == "RULE-test-sample"
+    assert rule_node["domain"] == "test"
+    assert rule_node["status"] == "active"
+    assert rule_node["severity"] == "warning"
 
-        # Should be identical
-        assert nodes1 == nodes2
-        assert edges1 == edges2
+    # Read and parse edges
+    edges = _read_jsonl(exported_graph / "edges.jsonl")
 
+    # Should have edges for domain, tags, and docs
+    edge_types = {edge["type"] for edge in edges}
+    expected_edge_types = {"OF_DOMAIN", "HAS_TAG", "DOC"}
+    assert expected_edge_types.issubset(edge_types)
 
-def test_graphiti_export_content_structure(sample_rule):
-    """Test that exported JSONL has correct structure and content."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        export_path = Path(temp_dir) / "graph"
+    # Check that all edges originate from the rule
+    rule_edges = [e for e in edges if e["source"] == "RULE-test-sample"]
+    assert len(rule_edges) >= 4  # domain + 2 tags + doc
 
-        index = GraphitiIndex(mode="export_only", export_path=export_path)
-        index.upsert_card(sample_rule)
-        index.close()
 
-        # Read and parse nodes
-        nodes_file = export_path / "nodes.jsonl"
-        nodes = []
-        with open(nodes_file) as f:
-            for line in f:
-                nodes.append(json.loads(line.strip()))
-
-        # Should have rule, domain, intent tags, and doc nodes
-        node_types = {node["type"] for node in nodes}
-        expected_types = {"RuleCard", "Domain", "IntentTag", "Doc"}
-        assert expected_types.issubset(node_types)
-
-        # Check rule card node
-        rule_nodes = [n for n in nodes if n["type"] == "RuleCard"]
-        assert len(rule_nodes) == 1
-        rule_node = rule_nodes[0]
-        assert rule_node["id"] == "RULE-test-sample"
-        assert rule_node["domain"] == "test"
-        assert rule_node["status"] == "active"
-        assert rule_node["severity"] == "warning"
-
-        # Read and parse edges
-        edges_file = export_path / "edges.jsonl"
-        edges = []
-        with open(edges_file) as f:
-            for line in f:
-                edges.append(json.loads(line.strip()))
-
-        # Should have edges for domain, tags, and docs
-        edge_types = {edge["type"] for edge in edges}
-        expected_edge_types = {"OF_DOMAIN", "HAS_TAG", "DOC"}
-        assert expected_edge_types.issubset(edge_types)
-
-        # Check that all edges originate from the rule
-        rule_edges = [e for e in edges if e["source"] == "RULE-test-sample"]
-        assert len(rule_edges) >= 4  # domain + 2 tags + doc
-
-
-def test_graphiti_export_sorted_output(sample_rule):
+def test_graphiti_export_sorted_output(sample_rule, tmp_path):
     """Test that exported JSONL is sorted by ID for deterministic output."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        export_path = Path(temp_dir) / "graph"
-
-        # Create multiple rules to test sorting
-        rule2 = RuleCard(
-            schema_version=1,
-            id="RULE-alpha-first",
-            name="Alpha Rule",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="alpha",
-            intent_tags=["alpha"],
-            action=Action(type=ActionType.MANUAL, steps=["Alpha step"]),
-            provenance=Provenance(
-                author="Test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
-        )
-
-        index = GraphitiIndex(mode="export_only", export_path=export_path)
-
-        # Add rules in reverse alphabetical order
-        index.upsert_card(sample_rule)  # RULE-test-sample
-        index.upsert_card(rule2)  # RULE-alpha-first
+    export_path = tmp_path / "graph"
 
-        index.close()
+    # Create multiple rules to test sorting
+    rule2 = RuleCard(
+        schema_version=1,
+        id="RULE-alpha-first",
+        name="Alpha Rule",
+        version=1,
+        status=Status.ACTIVE,
+        severity=Severity.INFO,
+        domain="alpha",
+        intent_tags=["alpha"],
+        action=Action(type=ActionType.MANUAL, steps=["Alpha step"]),
+        provenance=Provenance(
+            author="Test",
+            created="2024-01-01T00:00:00Z",
+            last_updated="2024-01-01T00:00:00Z",
+        ),
+    )
 
-        # Read nodes and check sorting
-        nodes_file = export_path / "nodes.jsonl"
-        with open(nodes_file) as f:
-            lines = f.readlines()
+    index = GraphitiIndex(mode="export_only", export_path=export_path)
 
-        # Parse first few nodes to check sorting
-        nodes = [json.loads(line.strip()) for line in lines[:5]]
-        node_ids = [node["id"] for node in nodes]
+    # Add rules in reverse alphabetical order
+    index.upsert_card(sample_rule)  # RULE-test-sample
+    index.upsert_card(rule2)  # RULE-alpha-first
 
-        # Should be sorted alphabetically
-        assert node_ids == sorted(node_ids)
+    index.close()
 
+    # Read nodes and check sorting of the first few
+    nodes = _read_jsonl(export_path / "nodes.jsonl", limit=5)
+    node_ids = [node["id"] for node in nodes]
 
-def test_graphiti_export_candidate_ids_returns_empty():
+    # Should be sorted alphabetically
+    assert node_ids == sorted(node_ids)
+
+
+def test_graphiti_export_candidate_ids_returns_empty(tmp_path):
     """Test that Graphiti export mode returns empty candidate list."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        export_path = Path(temp_dir) / "graph"
+    export_path = tmp_path / "graph"
 
-        index = GraphitiIndex(mode="export_only", export_path=export_path)
-        request = PackRequest(path=".", intent_tags=["testing"])
+    index = GraphitiIndex(mode="export_only", export_path=export_path)
+    request = PackRequest(path=".", intent_tags=["testing"])
 
-        result = index.candidate_ids(request)
+    result = index.candidate_ids(request)
 
-        assert result == []
+    assert result == []
 
-        index.close()
+    index.close()
+
+
+def test_graphiti_export_without_orjson(sample_rule, tmp_path, monkeypatch):
+    """Test that the stdlib JSON fallback writes the same bytes as orjson."""
+    index = GraphitiIndex(mode="export_only", export_path=tmp_path / "graph")
+    index.upsert_card(sample_rule.model_copy(update={"name": "Sample é  "}))
+    nodes = index._serialize_nodes()
+
+    monkeypatch.setattr("hermezos.index.graphiti.orjson", None)
+    assert index._serialize_nodes() == nodes
+
+
+def test_graphiti_export_wide_ints(sample_rule, tmp_path, monkeypatch):
+    """Test that values orjson cannot encode fall back to the stdlib encoder."""
+    index = GraphitiIndex(mode="export_only", export_path=tmp_path / "graph")
+    index.upsert_card(sample_rule.model_copy(update={"version": 2**70}))
+    nodes = index._serialize_nodes()
+    assert b'"version":1180591620717411303424' in nodes
+
+    monkeypatch.setattr("hermezos.index.graphiti.orjson", None)
+    assert index._serialize_nodes() == nodes
+
+
+def test_graphiti_export_upsert_replaces_edges(sample_rule, tmp_path):
+    """Test that re-upserting a card replaces its edges instead of adding more."""
+    index = GraphitiIndex(mode="export_only", export_path=tmp_path / "graph")
+    index.upsert_card(sample_rule)
+    index.upsert_card(sample_rule.model_copy(update={"intent_tags": ["retagged"]}))
+
+    edges = [e for e in index._edges if e["source"] == "RULE-test-sample"]
+    assert sorted(e["target"] for e in edges) == [
+        "doc:./docs/test.md",
+        "domain:test",
+        "tag:retagged",
+    ]
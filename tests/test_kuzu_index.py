@@ -1,8 +1,5 @@
 """Tests for KuzuIndex implementation."""
 
-import tempfile
-from pathlib import Path
-
 import pytest
 
 from hermezos.models import (
@@ -22,14 +19,31 @@ kuzu = pytest.importorskip("kuzu")
 from hermezos.index.kuzu_index import KuzuIndex  # noqa: E402
 
 
-@pytest.fixture
-def temp_db_path():
-    """Create a temporary file path for Kuzu database."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        yield Path(temp_dir) / "test_kuzu.db"
+@pytest.fixture(scope="module")
+def temp_db_path(tmp_path_factory):
+    """Create a temporary file path for Kuzu database.
+
+    tmp_path_factory gives each pytest-xdist worker its own base directory,
+    so workers never contend for the same database lock.
+    """
+    return tmp_path_factory.mktemp("kuzu") / "test_kuzu.db"
+
+
+@pytest.fixture(scope="module")
+def kuzu_index(temp_db_path):
+    """Open one KuzuIndex for the module, so the schema is created once."""
+    index = KuzuIndex(temp_db_path)
+    yield index
+    index.close()
+
 
+@pytest.fixture(autouse=True)
+def clear_kuzu_index(kuzu_index):
+    """Start every test from an empty database."""
+    kuzu_index.conn.execute("MATCH (n) DETACH DELETE n")
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def sample_rules():
     """Create sample rule cards for testing."""
     return [
@@ -84,206 +98,196 @@ def sample_rules():
     ]
 
 
-def test_kuzu_index_initialization(temp_db_path):
+def test_kuzu_index_initialization(temp_db_path, kuzu_index):
     """Test that KuzuIndex initializes correctly."""
-    index = KuzuIndex(temp_db_path)
-
     # Database directory should be created
     assert temp_db_path.exists()
 
-    # Should be able to close without errors
-    index.close()
+    # Schema setup should be a no-op on an initialized database
+    kuzu_index._init_schema()
 
 
-def test_kuzu_index_upsert_and_query(temp_db_path, sample_rules):
+def test_kuzu_index_upsert_and_query(kuzu_index, sample_rules):
     """Test upserting rules and querying by intent tags."""
-    index = KuzuIndex(temp_db_path)
-
-    try:
-        # Upsert all sample rules
-        for rule in sample_rules:
-            index.upsert_card(rule)
+    # Upsert all sample rules
+    kuzu_index.upsert_cards(sample_rules)
 
-        # Query by intent tag "testing"
-        request = PackRequest(path=".", intent_tags=["testing"])
-        candidates = index.candidate_ids(request)
+    # Query by intent tag "testing"
+    request = PackRequest(path=".", intent_tags=["testing"])
+    candidates = kuzu_index.candidate_ids(request)
 
-        # Should return rules with "testing" tag
-        expected_ids = {"RULE-test-alpha", "RULE-test-beta"}
-        assert set(candidates) == expected_ids
+    # Should return rules with "testing" tag
+    expected_ids = {"RULE-test-alpha", "RULE-test-beta"}
+    assert set(candidates) == expected_ids
 
-        # Results should be sorted
-        assert candidates == sorted(candidates)
+    # Results should be sorted
+    assert candidates == sorted(candidates)
 
-    finally:
-        index.close()
 
-
-def test_kuzu_index_query_multiple_tags(temp_db_path, sample_rules):
+def test_kuzu_index_query_multiple_tags(kuzu_index, sample_rules):
     """Test querying with multiple intent tags (OR logic)."""
-    index = KuzuIndex(temp_db_path)
-
-    try:
-        # Upsert all sample rules
-        for rule in sample_rules:
-            index.upsert_card(rule)
-
-        # Query by multiple tags
-        request = PackRequest(path=".", intent_tags=["alpha", "gamma"])
-        candidates = index.candidate_ids(request)
+    # Upsert all sample rules
+    kuzu_index.upsert_cards(sample_rules)
 
-        # Should return rules with either "alpha" or "gamma" tag
-        expected_ids = {"RULE-test-alpha", "RULE-prod-gamma"}
-        assert set(candidates) == expected_ids
+    # Query by multiple tags
+    request = PackRequest(path=".", intent_tags=["alpha", "gamma"])
+    candidates = kuzu_index.candidate_ids(request)
 
-    finally:
-        index.close()
+    # Should return rules with either "alpha" or "gamma" tag
+    expected_ids = {"RULE-test-alpha", "RULE-prod-gamma"}
+    assert set(candidates) == expected_ids
 
 
-def test_kuzu_index_query_no_matches(temp_db_path, sample_rules):
+def test_kuzu_index_query_no_matches(kuzu_index, sample_rules):
     """Test querying with tags that don't match any rules."""
-    index = KuzuIndex(temp_db_path)
-
-    try:
-        # Upsert all sample rules
-        for rule in sample_rules:
-            index.upsert_card(rule)
-
-        # Query by non-existent tag
-        request = PackRequest(path=".", intent_tags=["nonexistent"])
-        candidates = index.candidate_ids(request)
+    # Upsert all sample rules
+    kuzu_index.upsert_cards(sample_rules)
 
-        # Should return empty list
-        assert candidates == []
+    # Query by non-existent tag
+    request = PackRequest(path=".", intent_tags=["nonexistent"])
+    candidates = kuzu_index.candidate_ids(request)
 
-    finally:
-        index.close()
+    # Should return empty list
+    assert candidates == []
 
 
-def test_kuzu_index_query_no_filters(temp_db_path, sample_rules):
+def test_kuzu_index_query_no_filters(kuzu_index, sample_rules):
     """Test querying without any filters returns all rules."""
-    index = KuzuIndex(temp_db_path)
+    # Upsert all sample rules
+    kuzu_index.upsert_cards(sample_rules)
 
-    try:
-        # Upsert all sample rules
-        for rule in sample_rules:
-            index.upsert_card(rule)
+    # Query without filters
+    request = PackRequest(path=".")
+    candidates = kuzu_index.candidate_ids(request)
 
-        # Query without filters
-        request = PackRequest(path=".")
-        candidates = index.candidate_ids(request)
+    # Should return all rule IDs
+    expected_ids = {"RULE-test-alpha", "RULE-test-beta", "RULE-prod-gamma"}
+    assert set(candidates) == expected_ids
 
-        # Should return all rule IDs
-        expected_ids = {"RULE-test-alpha", "RULE-test-beta", "RULE-prod-gamma"}
-        assert set(candidates) == expected_ids
 
-    finally:
-        index.close()
+def test_kuzu_index_upsert_skips_failing_card(kuzu_index, sample_rules):
+    """Test that one card failing to upsert does not drop the rest of the batch."""
 
+    class BrokenCard(RuleCard):
+        def compute_fingerprint(self) -> str:
+            raise RuntimeError("cannot fingerprint")
 
-def test_kuzu_index_delete_card(temp_db_path, sample_rules):
-    """Test deleting a rule card."""
-    index = KuzuIndex(temp_db_path)
+    broken = BrokenCard(
+        **sample_rules[0].model_dump(exclude={"id"}), id="RULE-test-broken"
+    )
+    kuzu_index.upsert_cards([*sample_rules, broken])
 
-    try:
-        # Upsert rules
-        for rule in sample_rules:
-            index.upsert_card(rule)
+    candidates = kuzu_index.candidate_ids(PackRequest(path="."))
+    assert set(candidates) == {"RULE-test-alpha", "RULE-test-beta", "RULE-prod-gamma"}
 
-        # Delete one rule
-        index.delete_card("RULE-test-alpha")
 
-        # Query should not return deleted rule
-        request = PackRequest(path=".", intent_tags=["testing"])
-        candidates = index.candidate_ids(request)
+def test_kuzu_index_delete_card(kuzu_index, sample_rules):
+    """Test deleting a rule card."""
+    # Upsert rules
+    kuzu_index.upsert_cards(sample_rules)
+
+    # Delete one rule
+    kuzu_index.delete_card("RULE-test-alpha")
 
-        # Should only return beta rule
-        assert candidates == ["RULE-test-beta"]
+    # Query should not return deleted rule
+    request = PackRequest(path=".", intent_tags=["testing"])
+    candidates = kuzu_index.candidate_ids(request)
 
-    finally:
-        index.close()
+    # Should only return beta rule
+    assert candidates == ["RULE-test-beta"]
 
 
-def test_kuzu_index_upsert_overwrites(temp_db_path):
+def test_kuzu_index_upsert_overwrites(kuzu_index):
     """Test that upserting the same rule ID overwrites existing data."""
-    index = KuzuIndex(temp_db_path)
+    # Create initial rule
+    rule1 = RuleCard(
+        schema_version=1,
+        id="RULE-test-update",
+        name="Original Rule",
+        version=1,
+        status=Status.ACTIVE,
+        severity=Severity.INFO,
+        domain="test",
+        intent_tags=["original"],
+        action=Action(type=ActionType.MANUAL, steps=["Original step"]),
+        provenance=Provenance(
+            author="Test",
+            created="2024-01-01T00:00:00Z",
+            last_updated="2024-01-01T00:00:00Z",
+        ),
+    )
+
+    # Upsert initial rule
+    kuzu_index.upsert_card(rule1)
+
+    # Query by original tag
+    request = PackRequest(path=".", intent_tags=["original"])
+    candidates = kuzu_index.candidate_ids(request)
+    assert candidates == ["RULE-test-update"]
+
+    # Create updated rule with same ID but different tags
+    rule2 = RuleCard(
+        schema_version=1,
+        id="RULE-test-update",
+        name="Updated Rule",
+        version=2,
+        status=Status.ACTIVE,
+        severity=Severity.WARNING,
+        domain="test",
+        intent_tags=["updated"],
+        action=Action(type=ActionType.MANUAL, steps=["Updated step"]),
+        provenance=Provenance(
+            author="Test",
+            created="2024-01-01T00:00:00Z",
+            last_updated="2024-01-02T00:00:00Z",
+        ),
+    )
 
-    try:
-        # Create initial rule
-        rule1 = RuleCard(
-            schema_version=1,
-            id="RULE-test-update",
-            name="Original Rule",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            intent_tags=["original"],
-            action=Action(type=ActionType.MANUAL, steps=["Original step"]),
-            provenance=Provenance(
-                author="Test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
-        )
+    # Upsert updated rule
+    kuzu_index.upsert_card(rule2)
 
-        # Upsert initial rule
-        index.upsert_card(rule1)
+    # Query by original tag should return nothing
+    request = PackRequest(path=".", intent_tags=["original"])
+    candidates = kuzu_index.candidate_ids(request)
+    assert candidates == []
 
-        # Query by original tag
-        request = PackRequest(path=".", intent_tags=["original"])
-        candidates = index.candidate_ids(request)
-        assert candidates == ["RULE-test-update"]
+    # Query by updated tag should return the rule
+    request = PackRequest(path=".", intent_tags=["updated"])
+    candidates = kuzu_index.candidate_ids(request)
+    assert candidates == ["RULE-test-update"]
 
-        # Create updated rule with same ID but different tags
-        rule2 = RuleCard(
-            schema_version=1,
-            id="RULE-test-update",
-            name="Updated Rule",
-            version=2,
-            status=Status.ACTIVE,
-            severity=Severity.WARNING,
-            domain="test",
-            intent_tags=["updated"],
-            action=Action(type=ActionType.MANUAL, steps=["Updated step"]),
-            provenance=Provenance(
-                author="Test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-02T00:00:00Z",
-            ),
-        )
 
-        # Upsert updated rule
-        index.upsert_card(rule2)
+def test_kuzu_index_error_handling(kuzu_index):
+    """Test that KuzuIndex handles errors gracefully."""
+    # Test querying with invalid request (should not crash)
+    request = PackRequest(path=".", intent_tags=["test"])
+    candidates = kuzu_index.candidate_ids(request)
 
-        # Query by original tag should return nothing
-        request = PackRequest(path=".", intent_tags=["original"])
-        candidates = index.candidate_ids(request)
-        assert candidates == []
+    # Should return empty list when no data exists
+    assert candidates == []
 
-        # Query by updated tag should return the rule
-        request = PackRequest(path=".", intent_tags=["updated"])
-        candidates = index.candidate_ids(request)
-        assert candidates == ["RULE-test-update"]
+    # Test deleting non-existent rule (should not crash)
+    kuzu_index.delete_card("RULE-nonexistent")
 
-    finally:
-        index.close()
 
+def test_kuzu_index_upsert_cards_last_duplicate_wins(kuzu_index, sample_rules):
+    """Test that bulk upserts keep the last card for a repeated ID."""
+    retagged = sample_rules[0].model_copy(update={"intent_tags": ["retagged"]})
+    kuzu_index.upsert_cards([*sample_rules, retagged])
 
-def test_kuzu_index_error_handling(temp_db_path):
-    """Test that KuzuIndex handles errors gracefully."""
-    index = KuzuIndex(temp_db_path)
+    request = PackRequest(path=".", intent_tags=["alpha", "retagged"])
+    assert kuzu_index.candidate_ids(request) == ["RULE-test-alpha"]
 
-    try:
-        # Test querying with invalid request (should not crash)
-        request = PackRequest(path=".", intent_tags=["test"])
-        candidates = index.candidate_ids(request)
+    request = PackRequest(path=".", intent_tags=["testing"])
+    assert kuzu_index.candidate_ids(request) == ["RULE-test-beta"]
 
-        # Should return empty list when no data exists
-        assert candidates == []
 
-        # Test deleting non-existent rule (should not crash)
-        index.delete_card("RULE-nonexistent")
+def test_kuzu_index_close_is_idempotent(tmp_path):
+    """Test that closing an index twice releases the database only once."""
+    index = KuzuIndex(tmp_path / "closing.db")
+    index.close()
+    assert index.conn.is_closed
+    index.close()
 
-    finally:
-        index.close()
+    # The database lock is released, so the path can be reopened
+    KuzuIndex(tmp_path / "closing.db").close()
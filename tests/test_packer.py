@@ -13,21 +13,86 @@ from hermezos.models import (
     PackRequest,
     Provenance,
     RuleCard,
+    RuleMatch,
     Scope,
     Severity,
     Status,
     Trigger,
     TriggerType,
 )
-from hermezos.packer import RulePacker
+from hermezos.packer import (
+    RulePacker,
+    _FileSource,
+    _NeedleMatcher,
+    _path_parts,
+    _PatternSet,
+    _required_literal,
+)
 from hermezos.storage.filesystem import FileSystemStorage
 
 
+@pytest.fixture(scope="session")
+def shared_tree(tmp_path_factory):
+    """Create read-only project trees once for all packer tests.
+
+    Each subdirectory is packed on its own; tests that write files use
+    tmp_path instead.
+    """
+    root = tmp_path_factory.mktemp("trees")
+    files = {
+        "gradle/build.gradle": "test pattern here",
+        "misc/build.gradle.kts": "no match here",
+        "misc/test.txt": "test content",
+        "filters/build.gradle.kts": "kotlin content",
+        "filters/build.gradle": "groovy content",
+        "filters/script.py": "python content",
+        "mixed/build.gradle": "test content",
+        "mixed/build.gradle.kts": "kotlin test",
+        "mixed/readme.txt": "no match",
+        "mixed/script.py": "python code",
+    }
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(content)
+    (root / "empty").mkdir()
+    return root
+
+
+@pytest.fixture(scope="module")
+def packer_instance():
+    """Share one RulePacker across the module; it keeps no per-pack state."""
+    return RulePacker()
+
+
 class TestRulePacker:
     """Test RulePacker functionality."""
 
     @pytest.fixture
-    def temp_registry(self):
+    def sample_rule(self):
+        """Create the Android test rule used across packer tests."""
+        return RuleCard(
+            schema_version=1,
+            id="RULE-android-test",
+            name="Test Android Rule",
+            version=1,
+            status=Status.ACTIVE,
+            severity=Severity.WARNING,
+            domain="android",
+            intent_tags=["test"],
+            scope=Scope(file_globs=["*.gradle"], languages=["groovy"]),
+            triggers=[Trigger(type=TriggerType.PATH_CONTAINS, value=".gradle")],
+            detectors=[Detector(type=DetectorType.REGEX, pattern=r"test.*")],
+            action=Action(type=ActionType.MANUAL, steps=["Fix the test issue"]),
+            provenance=Provenance(
+                author="Test",
+                created="2024-01-15T10:00:00Z",
+                last_updated="2024-01-15T10:00:00Z",
+            ),
+        )
+
+    @pytest.fixture
+    def temp_registry(self, sample_rule):
         """Create a temporary registry for testing."""
         with tempfile.TemporaryDirectory() as temp_dir:
             registry_path = Path(temp_dir) / "registry"
@@ -37,107 +102,251 @@ class TestRulePacker:
             android_domain = registry_path / "android"
             android_domain.mkdir()
 
-            # Create a test rule
-            rule = RuleCard(
-                schema_version=1,
-                id="RULE-android-test",
-                name="Test Android Rule",
-                version=1,
-                status=Status.ACTIVE,
-                severity=Severity.WARNING,
-                domain="android",
-                intent_tags=["test"],
-                scope=Scope(file_globs=["*.gradle"], languages=["groovy"]),
-                triggers=[Trigger(type=TriggerType.PATH_CONTAINS, value=".gradle")],
-                detectors=[Detector(type=DetectorType.REGEX, pattern=r"test.*")],
-                action=Action(type=ActionType.MANUAL, steps=["Fix the test issue"]),
-                provenance=Provenance(
-                    author="Test",
-                    created="2024-01-15T10:00:00Z",
-                    last_updated="2024-01-15T10:00:00Z",
-                ),
-            )
-
             # Save rule to file
             storage = FileSystemStorage(registry_path)
-            storage.save_card(rule)
+            storage.save_card(sample_rule)
 
             yield registry_path
 
     @pytest.fixture
-    def packer(self, temp_registry):
-        """Create a RulePacker instance."""
-        storage = FileSystemStorage(temp_registry)
-        rules = storage.list_rules()
-        return RulePacker(), rules
+    def packer(self, packer_instance, sample_rule):
+        """Pair the shared RulePacker with the sample rule."""
+        return packer_instance, [sample_rule]
 
-    def test_scope_matching(self, packer):
+    def test_registry_round_trip(self, temp_registry, packer):
+        """Test that the registry loads the same rule the packer tests use."""
+        _, rules = packer
+        assert FileSystemStorage(temp_registry).list_rules() == rules
+
+    def test_scope_matching(self, packer, shared_tree):
         """Test scope-based rule filtering."""
         packer_instance, rules = packer
 
-        # Create test files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
+        # A file that should match and one that shouldn't
+        gradle_file = shared_tree / "gradle" / "build.gradle"
+        txt_file = shared_tree / "misc" / "test.txt"
 
-            # Create files that should match
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test content")
+        # Should match gradle file
+        assert packer_instance._matches_scope(rules[0], *_path_parts(gradle_file))
 
-            # Create files that shouldn't match
-            txt_file = test_dir / "test.txt"
-            txt_file.write_text("test content")
+        # Should not match txt file
+        assert not packer_instance._matches_scope(rules[0], *_path_parts(txt_file))
 
-            # Should match gradle file
-            assert packer_instance._matches_scope(rules[0], gradle_file)
+    def test_trigger_evaluation(self, packer, shared_tree):
+        """Test trigger evaluation."""
+        packer_instance, rules = packer
 
-            # Should not match txt file
-            assert not packer_instance._matches_scope(rules[0], txt_file)
+        gradle_file = shared_tree / "gradle" / "build.gradle"
+        rule = rules[0]
 
-    def test_trigger_evaluation(self, packer):
-        """Test trigger evaluation."""
+        # Should trigger on path containing .gradle
+        triggers = packer_instance._evaluate_triggers(rule, *_path_parts(gradle_file))
+        assert len(triggers) == 1
+        assert "path contains '.gradle'" in triggers[0]
+
+    def test_trigger_evaluation_with_path_needles(self, packer):
+        """Test triggers evaluated from precomputed path needles."""
         packer_instance, rules = packer
+        rule = rules[0]
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("content")
+        gradle_path = Path("app") / "build.gradle"
+        needles = _NeedleMatcher([".gradle", "src/main", ""]).find(str(gradle_path))
+        assert needles == {".gradle", ""}
 
-            rule = rules[0]
+        parts = _path_parts(gradle_path)
+        assert packer_instance._evaluate_triggers(
+            rule, *parts, needles
+        ) == packer_instance._evaluate_triggers(rule, *parts)
+        assert not packer_instance._evaluate_triggers(rule, *parts, set())
 
-            # Should trigger on path containing .gradle
-            triggers = packer_instance._evaluate_triggers(rule, gradle_file)
-            assert len(triggers) == 1
-            assert "path contains '.gradle'" in triggers[0]
+    def test_file_exists_trigger(self, packer, shared_tree):
+        """Test FILE_EXISTS triggers, stat'd once per pack or per call."""
+        packer_instance, rules = packer
+        marker = str(shared_tree / "misc" / "test.txt")
+        rule = rules[0].model_copy(
+            update={"triggers": [Trigger(type=TriggerType.FILE_EXISTS, value=marker)]}
+        )
 
-    def test_detector_evaluation(self, packer):
+        parts = _path_parts(shared_tree / "gradle" / "build.gradle")
+        expected = [f"file exists '{marker}'"]
+        assert packer_instance._evaluate_triggers(rule, *parts) == expected
+        assert packer_instance._evaluate_triggers(rule, *parts, None, {marker}) == (
+            expected
+        )
+        assert not packer_instance._evaluate_triggers(rule, *parts, None, set())
+
+        bundle = packer_instance.pack(
+            [rule], PackRequest(path=str(shared_tree / "gradle"))
+        )
+        assert bundle.rules[0].triggered_by == expected
+
+    def test_detector_evaluation(self, packer, shared_tree):
         """Test detector evaluation."""
         packer_instance, rules = packer
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
+        # Files with and without matching content
+        gradle_file = shared_tree / "gradle" / "build.gradle"
+        gradle_file2 = shared_tree / "misc" / "build.gradle.kts"
+
+        rule = rules[0]
+
+        # Should detect in first file
+        detected, detections = packer_instance._evaluate_detectors(
+            rule, *_path_parts(gradle_file)
+        )
+        assert detected
+        assert len(detections) == 1
+
+        # Should not detect in second file
+        detected2, detections2 = packer_instance._evaluate_detectors(
+            rule, *_path_parts(gradle_file2)
+        )
+        assert not detected2
+
+    def test_literal_detector_evaluation(self, packer, tmp_path):
+        """Test literal detector patterns report the matching line."""
+        packer_instance, rules = packer
+        rule = rules[0].model_copy(
+            update={
+                "detectors": [Detector(type=DetectorType.REGEX, pattern="TODO item")]
+            }
+        )
+
+        gradle_file = tmp_path / "build.gradle"
+        gradle_file.write_text("first line\nsecond TODO item\n")
+
+        detected, detections = packer_instance._evaluate_detectors(
+            rule, *_path_parts(gradle_file)
+        )
+        assert detected
+        assert detections == ["regex 'TODO item' found in build.gradle:2"]
 
-            # File with matching content
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test pattern here")
+    def test_regex_detector_line_numbers(self, packer, tmp_path):
+        """Test regex detectors report lines for bytes and text searches."""
+        packer_instance, rules = packer
 
-            # File without matching content
-            gradle_file2 = test_dir / "build.gradle.kts"
-            gradle_file2.write_text("no match here")
+        ascii_content = b"plugins {\n  id 'x'\n}\ncompile 'y'\n"
+        cases = [
+            # Raw bytes search over an ASCII file
+            (ascii_content, r"^\s*id\s", 2),
+            (ascii_content, r"plugins\s+\{$", 1),
+            (ascii_content, r"\}\s+compile", None),
+            # Carriage returns fall back to a line-by-line search
+            (ascii_content.replace(b"\n", b"\r\n"), r"'x'$", 2),
+            # Non-ASCII patterns or files search the decoded text
+            (b"plugins {\n\xff\xfe\ncompile 'caf\xc3\xa9'\n", r"caf\u00e9", 3),
+            (b"plugins {\n\xff\xfe\ncompile 'caf\xc3\xa9'\n", "'café'", 3),
+            (b"plugins {\n\xff\xfe\ncompile 'caf\xc3\xa9'\n", r"caf\w'", 3),
+            (b"plugins {\n\xff\xfe\ncompile 'caf\xc3\xa9'\n", r"^compile", 3),
+            # Anchors and lookarounds only see the current line
+            (b"plugins {\ncompile 'caf\xc3\xa9'\n", r"\Acompile", 2),
+            (b"plugins {\ncompile 'caf\xc3\xa9'\n", r"\{(?!\s)", 1),
+            # Form feeds split lines in text but not in bytes
+            (b"plugins {\x0ccompile 'y'\n", r"^compile", 2),
+            # No empty line after the trailing newline
+            (b"caf\xc3\xa9\n", r"^$", None),
+        ]
 
-            rule = rules[0]
+        gradle_file = tmp_path / "build.gradle"
 
-            # Should detect in first file
+        for content, pattern, line in cases:
+            gradle_file.write_bytes(content)
+            rule = rules[0].model_copy(
+                update={
+                    "detectors": [Detector(type=DetectorType.REGEX, pattern=pattern)]
+                }
+            )
             detected, detections = packer_instance._evaluate_detectors(
-                rule, gradle_file
+                rule, *_path_parts(gradle_file)
             )
-            assert detected
-            assert len(detections) == 1
+            if line is None:
+                assert not detected
+            else:
+                assert detections == [f"regex '{pattern}' found in build.gradle:{line}"]
 
-            # Should not detect in second file
-            detected2, detections2 = packer_instance._evaluate_detectors(
-                rule, gradle_file2
-            )
-            assert not detected2
+    def test_regex_detector_file_glob(self, packer, tmp_path):
+        """Test regex detectors only search files matching their glob."""
+        packer_instance, rules = packer
+
+        gradle_file = tmp_path / "build.gradle"
+        gradle_file.write_text("plugins {\n}\n")
+        text_file = tmp_path / "notes.txt"
+        text_file.write_text("plugins {\n}\n")
+
+        rule = rules[0].model_copy(
+            update={
+                "detectors": [
+                    Detector(
+                        type=DetectorType.REGEX, pattern="plugins", file_glob="*.gradle"
+                    )
+                ]
+            }
+        )
+        detected, _ = packer_instance._evaluate_detectors(
+            rule, *_path_parts(gradle_file)
+        )
+        assert detected
+        detected, _ = packer_instance._evaluate_detectors(rule, *_path_parts(text_file))
+        assert not detected
+
+    def test_required_literal_prefilter(self, tmp_path):
+        """Test that regex detectors are prefiltered by required literals."""
+        assert _required_literal(r"\bimport\s+os") == "import"
+        assert _required_literal(r"compile\s*\(") == "compile"
+        assert _required_literal(r"[abc]defg") == "defg"
+        assert _required_literal(r"abcd*") == "abc"
+        # Alternations, inline flags and short runs give no literal
+        assert _required_literal(r"plugins|compile") is None
+        assert _required_literal(r"(?i)plugins") is None
+        assert _required_literal(r"^\s*id\s") is None
+        # Code point escapes end a run without leaking their digits
+        assert _required_literal(r"caf\u00e9") == "caf"
+        assert _required_literal(r"\u0041bc") is None
+        assert _required_literal(r"\x41bcd") == "bcd"
+        assert _required_literal(r"\N{LATIN SMALL LETTER A}bc") is None
+        assert _required_literal(r"(a)\1234") is None
+
+        gradle_file = tmp_path / "build.gradle"
+        gradle_file.write_text("plugins {\n  id 'x'\n}\n")
+        source = _FileSource(str(gradle_file), _NeedleMatcher(["plugins", "compile"]))
+        assert source.may_match(r"plugins\s+\{")
+        assert not source.may_match(r"compile\s*\(")
+        # Patterns without a registered literal are never skipped
+        assert source.may_match(r"^\s*id\s")
+        assert source.may_match(r"implementation\(")
+
+        text_file = tmp_path / "notes.txt"
+        text_file.write_bytes("compile 'café'\n".encode())
+        literals = _NeedleMatcher(
+            [_required_literal(r"caf\u00e9"), _required_literal(r"compile\s+'")]
+        )
+        source = _FileSource(str(text_file), literals)
+        assert source.may_match(r"caf\u00e9")
+
+    def test_pattern_set_prefilter(self, tmp_path):
+        """Test that regex detectors are prefiltered by one RE2 set scan."""
+        pytest.importorskip("re2")
+        patterns = _PatternSet(
+            [r"^\s*id\s", r"compile\s*\(", r"\Aplugins", r"id(?=\s)", r"a{,2}b"]
+        )
+        # Line-context, re-only and divergent syntax is left uncovered
+        assert r"^\s*id\s" in patterns
+        assert r"compile\s*\(" in patterns
+        assert r"\Aplugins" not in patterns
+        assert r"id(?=\s)" not in patterns
+        assert r"a{,2}b" not in patterns
+
+        gradle_file = tmp_path / "build.gradle"
+        gradle_file.write_bytes(b"plugins {\n  id 'x'\n}\n")
+        source = _FileSource(str(gradle_file), patterns=patterns)
+        assert source.may_match(r"^\s*id\s")
+        assert not source.may_match(r"compile\s*\(")
+        assert source.may_match(r"\Aplugins")
+
+        # Files with line breaks re does not treat as "\n" are not covered
+        gradle_file.write_bytes(b"plugins {\r\n  id 'x'\r\n}\r\n")
+        source = _FileSource(str(gradle_file), patterns=patterns)
+        assert source.may_match(r"compile\s*\(")
 
     def test_rule_sorting(self, packer):
         """Test deterministic rule sorting."""
@@ -183,10 +392,8 @@ class TestRulePacker:
         assert sorted_rules[0].severity == Severity.ERROR
         assert sorted_rules[1].severity == Severity.INFO
 
-    def test_pack_request_filtering(self):
+    def test_pack_request_filtering(self, packer_instance):
         """Test pack request filtering."""
-        packer_instance = RulePacker()
-
         # Create additional test rules
         rule1 = RuleCard(
             schema_version=1,
@@ -242,36 +449,55 @@ class TestRulePacker:
         assert len(filtered) == 1
         assert filtered[0].domain == "python"
 
-    def test_pack_integration(self, packer):
+    def test_pack_integration(self, packer, shared_tree):
         """Test full pack operation."""
         packer_instance, rules = packer
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
+        # Pack a tree with a gradle file holding test content
+        request = PackRequest(path=str(shared_tree / "gradle"))
 
-            # Create a gradle file with test content
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test pattern here")
+        # Pack rules
+        bundle = packer_instance.pack(rules, request)
 
-            # Create pack request
-            request = PackRequest(path=str(test_dir))
+        # Should find the test rule
+        assert len(bundle.rules) == 1
+        assert bundle.rules[0].rule.id == "RULE-android-test"
+        assert bundle.total_rules == 1
+        assert bundle.pack_fingerprint is not None
+        assert bundle.hermez_version == "1.0.0"
+        assert bundle.actions_summary is not None
 
-            # Pack rules
-            bundle = packer_instance.pack(rules, request)
+    def test_actions_summary_accepts_plain_strings(self, packer):
+        """Test that the actions summary handles enum members and plain strings."""
+        packer_instance, rules = packer
+        plain = rules[0].model_copy(
+            update={
+                "action": Action.model_construct(type="manual", steps=["step"]),
+                "severity": "error",
+            }
+        )
+        matches = [
+            RuleMatch(rule=rule, fingerprint="0" * 64) for rule in (rules[0], plain)
+        ]
 
-            # Should find the test rule
-            assert len(bundle.rules) == 1
-            assert bundle.rules[0].rule.id == "RULE-android-test"
-            assert bundle.total_rules == 1
-            assert bundle.pack_fingerprint is not None
-            assert bundle.hermez_version == "1.0.0"
-            assert bundle.actions_summary is not None
+        summary = packer_instance._build_actions_summary(matches)
+        assert summary["action_types"] == {"manual": 2}
+        assert summary["severities"] == {rules[0].severity.value: 1, "error": 1}
+
+    def test_pack_skips_large_files_for_regex(self, packer, shared_tree):
+        """Test that regex detectors skip files over max_file_size_bytes."""
+        packer_instance, rules = packer
+        path = str(shared_tree / "gradle")
 
-    def test_pack_request_with_filters(self):
+        request = PackRequest(path=path, max_file_size_bytes=4)
+        assert packer_instance.pack(rules, request).rules == []
+
+        request = PackRequest(path=path, max_file_size_bytes=None)
+        assert len(packer_instance.pack(rules, request).rules) == 1
+
+    def test_pack_request_with_filters(self, packer_instance, shared_tree):
         """Test PackRequest with specific filters: intent_tags=["build"],
         languages=["kotlin"], file_globs=["**/*"], limit=5."""
-        packer_instance = RulePacker()
-
         # Create test rules with different properties
         rules = [
             RuleCard(
@@ -327,102 +553,109 @@ class TestRulePacker:
             ),
         ]
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
-
-            # Create test files
-            kotlin_file = test_dir / "build.gradle.kts"
-            kotlin_file.write_text("kotlin content")
-
-            groovy_file = test_dir / "build.gradle"
-            groovy_file.write_text("groovy content")
-
-            python_file = test_dir / "script.py"
-            python_file.write_text("python content")
-
-            # Create pack request with specific filters
-            request = PackRequest(
-                path=str(test_dir),
-                intent_tags=["build"],
-                languages=["kotlin"],
-                file_globs=["**/*"],
-                limit=5,
-            )
+        # Create pack request with specific filters over kotlin, groovy and
+        # python files
+        request = PackRequest(
+            path=str(shared_tree / "filters"),
+            intent_tags=["build"],
+            languages=["kotlin"],
+            file_globs=["**/*"],
+            limit=5,
+        )
 
-            # Pack rules
-            bundle = packer_instance.pack(rules, request)
+        # Pack rules
+        bundle = packer_instance.pack(rules, request)
 
-            # Should find at least 1 rule (the kotlin one)
-            assert len(bundle.rules) >= 1
+        # Should find at least 1 rule (the kotlin one)
+        assert len(bundle.rules) >= 1
 
-            # Check that the rule matches our filters
-            kotlin_rule_found = any(
-                r.rule.id == "RULE-android-build-kotlin" for r in bundle.rules
-            )
-            assert kotlin_rule_found, "Kotlin build rule should be found"
+        # Check that the rule matches our filters
+        kotlin_rule_found = any(
+            r.rule.id == "RULE-android-build-kotlin" for r in bundle.rules
+        )
+        assert kotlin_rule_found, "Kotlin build rule should be found"
 
-            # Check fingerprints are present
-            for rule_match in bundle.rules:
-                assert rule_match.fingerprint is not None
-                assert len(rule_match.fingerprint) > 0
+        # Check fingerprints are present
+        for rule_match in bundle.rules:
+            assert rule_match.fingerprint is not None
+            assert len(rule_match.fingerprint) > 0
 
-    def test_deterministic_ordering_and_fingerprints(self, packer):
+    def test_deterministic_ordering_and_fingerprints(self, packer, shared_tree):
         """Test that packing produces deterministic order and fingerprints."""
         packer_instance, rules = packer
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
+        request = PackRequest(path=str(shared_tree / "gradle"))
+
+        # Run pack multiple times
+        bundle1 = packer_instance.pack(rules, request)
+        bundle2 = packer_instance.pack(rules, request)
 
-            # Create test file
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test pattern")
+        # Results should be identical
+        assert bundle1.pack_fingerprint == bundle2.pack_fingerprint
+        assert len(bundle1.rules) == len(bundle2.rules)
+        assert bundle1.total_rules == bundle2.total_rules
 
-            request = PackRequest(path=str(test_dir))
+        # Rule fingerprints should be identical
+        for i, rule_match in enumerate(bundle1.rules):
+            assert rule_match.fingerprint == bundle2.rules[i].fingerprint
+            assert rule_match.rule.id == bundle2.rules[i].rule.id
 
-            # Run pack multiple times
-            bundle1 = packer_instance.pack(rules, request)
-            bundle2 = packer_instance.pack(rules, request)
+        # Check that fingerprints are deterministic across different pack runs
+        # by verifying they're not empty and have expected format (hex)
+        for rule_match in bundle1.rules:
+            assert rule_match.fingerprint is not None
+            assert len(rule_match.fingerprint) == 64  # SHA256 hex length
+            assert all(c in "0123456789abcdef" for c in rule_match.fingerprint)
 
-            # Results should be identical
-            assert bundle1.pack_fingerprint == bundle2.pack_fingerprint
-            assert len(bundle1.rules) == len(bundle2.rules)
-            assert bundle1.total_rules == bundle2.total_rules
+    def test_deterministic_packing(self, packer, shared_tree):
+        """Test that packing is deterministic."""
+        packer_instance, rules = packer
 
-            # Rule fingerprints should be identical
-            for i, rule_match in enumerate(bundle1.rules):
-                assert rule_match.fingerprint == bundle2.rules[i].fingerprint
-                assert rule_match.rule.id == bundle2.rules[i].rule.id
+        request = PackRequest(path=str(shared_tree / "gradle"))
 
-            # Check that fingerprints are deterministic across different pack runs
-            # by verifying they're not empty and have expected format (hex)
-            for rule_match in bundle1.rules:
-                assert rule_match.fingerprint is not None
-                assert len(rule_match.fingerprint) == 64  # SHA256 hex length
-                assert all(c in "0123456789abcdef" for c in rule_match.fingerprint)
+        # Pack multiple times
+        bundle1 = packer_instance.pack(rules, request)
+        bundle2 = packer_instance.pack(rules, request)
 
-    def test_deterministic_packing(self, packer):
-        """Test that packing is deterministic."""
+        # Should be identical
+        assert bundle1.pack_fingerprint == bundle2.pack_fingerprint
+        assert len(bundle1.rules) == len(bundle2.rules)
+        assert bundle1.rules[0].fingerprint == bundle2.rules[0].fingerprint
+
+    def test_parallel_scan_matches_sequential(self, packer, tmp_path, monkeypatch):
+        """Test that threaded file scanning merges results in file order."""
         packer_instance, rules = packer
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
+        for i in range(5):
+            (tmp_path / f"build{i}.gradle").write_text(f"line\ntest {i}\n")
 
-            # Create test file
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test pattern")
+        request = PackRequest(path=str(tmp_path))
+        sequential = packer_instance.pack(rules, request)
 
-            request = PackRequest(path=str(test_dir))
+        monkeypatch.setattr("hermezos.packer._PARALLEL_SCAN_MIN_FILES", 1)
+        parallel = packer_instance.pack(rules, request)
 
-            # Pack multiple times
-            bundle1 = packer_instance.pack(rules, request)
-            bundle2 = packer_instance.pack(rules, request)
+        assert len(sequential.rules[0].detected_in) == 5
+        assert parallel.rules[0].detected_in == sequential.rules[0].detected_in
+        assert parallel.rules[0].triggered_by == sequential.rules[0].triggered_by
 
-            # Should be identical
-            assert bundle1.pack_fingerprint == bundle2.pack_fingerprint
-            assert len(bundle1.rules) == len(bundle2.rules)
-            assert bundle1.rules[0].fingerprint == bundle2.rules[0].fingerprint
+    def test_invalid_regex_detector_skipped(self, packer, tmp_path):
+        """Test that an invalid regex detector is skipped rather than aborting."""
+        packer_instance, rules = packer
+        rule = rules[0].model_copy(
+            update={
+                "detectors": [Detector(type=DetectorType.REGEX, pattern="plugins (")]
+            }
+        )
+
+        gradle_file = tmp_path / "build.gradle"
+        gradle_file.write_text("plugins {\n}\n")
+        detected, _ = packer_instance._evaluate_detectors(
+            rule, *_path_parts(gradle_file)
+        )
+        assert not detected
 
-    def test_limit_application(self, packer):
+    def test_limit_application(self, packer, shared_tree):
         """Test rule limit application."""
         packer_instance, original_rules = packer
 
@@ -448,19 +681,16 @@ class TestRulePacker:
 
         all_rules = original_rules + additional_rules
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test")
+        test_dir = shared_tree / "gradle"
 
-            # Pack with limit
-            request = PackRequest(path=str(test_dir), limit=3)
-            bundle = packer_instance.pack(all_rules, request)
+        # Pack with limit
+        request = PackRequest(path=str(test_dir), limit=3)
+        bundle = packer_instance.pack(all_rules, request)
 
-            assert len(bundle.rules) == 3
-            assert bundle.total_rules == 3
+        assert len(bundle.rules) == 3
+        assert bundle.total_rules == 3
 
-    def test_deprecated_filtering(self, packer):
+    def test_deprecated_filtering(self, packer, shared_tree):
         """Test deprecated rule filtering."""
         packer_instance, original_rules = packer
 
@@ -500,39 +730,37 @@ class TestRulePacker:
 
         all_rules = original_rules + [deprecated_rule, active_rule]
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
-            gradle_file = test_dir / "build.gradle"
-            gradle_file.write_text("test")
+        test_dir = shared_tree / "gradle"
+
+        # Pack without deprecated
+        request = PackRequest(path=str(test_dir), include_deprecated=False)
+        bundle = packer_instance.pack(all_rules, request)
 
-            # Pack without deprecated
-            request = PackRequest(path=str(test_dir), include_deprecated=False)
-            bundle = packer_instance.pack(all_rules, request)
+        # Should only include active rule
+        rule_ids = [r.rule.id for r in bundle.rules]
+        assert "RULE-test-active" in rule_ids
+        assert "RULE-test-deprecated" not in rule_ids
 
-            # Should only include active rule
-            rule_ids = [r.rule.id for r in bundle.rules]
-            assert "RULE-test-active" in rule_ids
-            assert "RULE-test-deprecated" not in rule_ids
+        request = PackRequest(path=str(test_dir), include_deprecated=True)
+        bundle = packer_instance.pack(all_rules, request)
+        rule_ids = [r.rule.id for r in bundle.rules]
+        assert "RULE-test-deprecated" in rule_ids
 
 
 class TestPackerEdgeCases:
     """Test edge cases in packer logic."""
 
-    def test_empty_registry(self):
+    def test_empty_registry(self, packer_instance, shared_tree):
         """Test packing with empty registry."""
-        packer = RulePacker()
-
-        with tempfile.TemporaryDirectory() as test_dir:
-            request = PackRequest(path=test_dir)
-            bundle = packer.pack([], request)
+        request = PackRequest(path=str(shared_tree / "empty"))
+        bundle = packer_instance.pack([], request)
 
-            assert len(bundle.rules) == 0
-            assert bundle.total_rules == 0
-            assert bundle.pack_fingerprint is not None
+        assert len(bundle.rules) == 0
+        assert bundle.total_rules == 0
+        assert bundle.pack_fingerprint is not None
 
-    def test_nonexistent_path(self):
+    def test_nonexistent_path(self, packer_instance):
         """Test packing with nonexistent path."""
-        packer_instance = RulePacker()
         rules = []
 
         request = PackRequest(path="/nonexistent/path")
@@ -541,8 +769,9 @@ class TestPackerEdgeCases:
         # Should handle gracefully
         assert isinstance(bundle, object)
         assert bundle.total_rules == 0
+        assert packer_instance._collect_target_paths(request) == []
 
-    def test_mixed_file_types(self):
+    def test_mixed_file_types(self, packer_instance, shared_tree):
         """Test packing with mixed file types."""
         # Create a simple test rule for gradle files
         rule = RuleCard(
@@ -566,24 +795,9 @@ class TestPackerEdgeCases:
             ),
         )
 
-        packer_instance = RulePacker()
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_dir = Path(temp_dir)
-
-            # Create various file types
-            files = [
-                ("build.gradle", "test content"),
-                ("build.gradle.kts", "kotlin test"),
-                ("readme.txt", "no match"),
-                ("script.py", "python code"),
-            ]
-
-            for filename, content in files:
-                (test_dir / filename).write_text(content)
-
-            request = PackRequest(path=str(test_dir))
-            bundle = packer_instance.pack([rule], request)
+        # Pack a tree with gradle, kotlin, text and python files
+        request = PackRequest(path=str(shared_tree / "mixed"))
+        bundle = packer_instance.pack([rule], request)
 
-            # Should find rules for gradle files
-            assert len(bundle.rules) >= 1
+        # Should find rules for gradle files
+        assert len(bundle.rules) >= 1
@@ -2,12 +2,13 @@
 
 import json
 from pathlib import Path
-from unittest.mock import patch
+from types import SimpleNamespace
 
 import pytest
 import yaml
 
 from hermezos.models import (
+    DEFAULT_MAX_FILE_SIZE_BYTES,
     Action,
     ActionType,
     Detector,
@@ -26,6 +27,37 @@ from hermezos.models import (
     export_json_schemas,
 )
 
+# libyaml C parser when PyYAML was built with it, pure Python otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Provenance shared by the cards built in these tests
+_PROVENANCE_FIELDS = {
+    "author": "test",
+    "created": "2024-01-01T00:00:00Z",
+    "last_updated": "2024-01-01T00:00:00Z",
+}
+
+
+@pytest.fixture(scope="session")
+def base_rule():
+    """Build the canonical manual-action rule once for all schema tests.
+
+    Tests needing a variant take base_rule.model_copy(update=...) and must
+    not mutate the shared card. compute_fingerprint() normalizes the card in
+    place, so tests fingerprinting it directly work on model_copy(deep=True).
+    """
+    return RuleCard(
+        schema_version=1,
+        id="RULE-test-fp",
+        name="Fingerprint Test",
+        version=1,
+        status=Status.ACTIVE,
+        severity=Severity.INFO,
+        domain="test",
+        action=Action(type=ActionType.MANUAL, steps=["test"]),
+        provenance=Provenance(**_PROVENANCE_FIELDS),
+    )
+
 
 class TestRuleCard:
     """Test RuleCard model validation and functionality."""
@@ -73,11 +105,7 @@ class TestRuleCard:
             severity=Severity.INFO,
             domain="test",
             action=Action(type=ActionType.MANUAL, steps=["test"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
+            provenance=Provenance(**_PROVENANCE_FIELDS),
         )
 
         # Invalid IDs should raise ValidationError
@@ -91,107 +119,89 @@ class TestRuleCard:
                 severity=Severity.INFO,
                 domain="test",
                 action=Action(type=ActionType.MANUAL, steps=["test"]),
-                provenance=Provenance(
-                    author="test",
-                    created="2024-01-01T00:00:00Z",
-                    last_updated="2024-01-01T00:00:00Z",
-                ),
+                provenance=Provenance(**_PROVENANCE_FIELDS),
             ).normalize()
 
-    def test_default_retriable(self):
-        """Test default retriable value based on action type."""
-        # Manual action should not be retriable by default
-        rule = RuleCard(
-            schema_version=1,
-            id="RULE-test-manual",
-            name="Manual Rule",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.MANUAL, steps=["Do something"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
-        ).normalize()
-        assert rule.retriable is False
-
-        # Script action should be retriable by default
-        rule = RuleCard(
-            schema_version=1,
-            id="RULE-test-script",
-            name="Script Rule",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.SCRIPT, fix_command="echo test"),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
+    @pytest.mark.parametrize(
+        ("action", "expected_retriable", "expected_hint"),
+        [
+            # Manual actions are not retriable; the first step becomes the hint
+            (
+                Action(
+                    type=ActionType.MANUAL,
+                    steps=["First step to take", "Second step"],
+                ),
+                False,
+                "First step to take",
             ),
-        ).normalize()
-        assert rule.retriable is True
-
-    def test_default_hint_generation(self):
-        """Test automatic hint generation from action steps."""
+            # Script actions are retriable; without steps there is no hint
+            (Action(type=ActionType.SCRIPT, fix_command="echo test"), True, None),
+        ],
+        ids=["manual", "script"],
+    )
+    def test_derived_defaults(self, action, expected_retriable, expected_hint):
+        """Test default retriable and hint values derived from the action."""
         rule = RuleCard(
             schema_version=1,
-            id="RULE-test-hint",
-            name="Hint Test",
+            id="RULE-test-defaults",
+            name="Defaults Test",
             version=1,
             status=Status.ACTIVE,
             severity=Severity.INFO,
             domain="test",
-            action=Action(
-                type=ActionType.MANUAL, steps=["First step to take", "Second step"]
-            ),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
+            action=action,
+            provenance=Provenance(**_PROVENANCE_FIELDS),
         ).normalize()
 
-        # Should use first step as hint if not provided
-        assert rule.hint == "First step to take"
-
-    def test_fingerprint_computation(self):
+        assert rule.retriable is expected_retriable
+        assert rule.hint == expected_hint
+
+    def test_is_normalized(self):
+        """Test cards are marked normalized once their defaults are applied."""
+        fields = {
+            "schema_version": 1,
+            "id": "RULE-test-normalized",
+            "name": "Normalized Test",
+            "version": 1,
+            "status": Status.ACTIVE,
+            "severity": Severity.INFO,
+            "domain": "test",
+            "action": Action(type=ActionType.MANUAL, steps=["First step"]),
+            "provenance": Provenance(**_PROVENANCE_FIELDS),
+        }
+
+        rule = RuleCard(**fields)
+        assert not rule.is_normalized
+        assert rule.normalize().is_normalized
+
+        # A card saved after normalize() loads back already normalized
+        loaded = RuleCard(**rule.model_dump(exclude_unset=True))
+        assert loaded.is_normalized
+        assert loaded == rule
+        assert loaded.compute_fingerprint() == rule.compute_fingerprint()
+
+        # Updated copies have to be normalized again
+        assert rule.model_copy().is_normalized
+        updated = rule.model_copy(update={"severity": Severity.ERROR})
+        assert not updated.is_normalized
+        assert updated.sort_key[1] == 0
+
+        # The sort key follows fields reassigned after normalize()
+        updated.normalize().status = Status.DEPRECATED
+        assert updated.sort_key[0] == 2
+        assert not updated.is_normalized
+
+        # Normalization state does not affect equality
+        defaults = {"retriable": False, "hint": "First step"}
+        fresh = RuleCard(**fields, **defaults)
+        assert not fresh.is_normalized
+        assert fresh == RuleCard(**fields, **defaults).normalize()
+
+    def test_fingerprint_computation(self, base_rule):
         """Test rule fingerprint computation."""
-        rule1 = RuleCard(
-            schema_version=1,
-            id="RULE-test-fp",
-            name="Fingerprint Test",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.MANUAL, steps=["test"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
-        )
-
-        rule2 = RuleCard(
-            schema_version=1,
-            id="RULE-test-fp",
-            name="Fingerprint Test",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.MANUAL, steps=["test"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
-        )
+        rule1 = base_rule.model_copy(deep=True)
+        # Validated independently from the same field values
+        rule2 = RuleCard(**base_rule.model_dump(exclude_unset=True))
 
         # Same content should produce same fingerprint
         assert rule1.compute_fingerprint() == rule2.compute_fingerprint()
@@ -200,6 +210,18 @@ class TestRuleCard:
         rule3 = rule1.model_copy(update={"version": 2})
         assert rule1.compute_fingerprint() != rule3.compute_fingerprint()
 
+        # Fingerprinting does not affect equality, and follows both
+        # reassigned fields and nested lists changed in place
+        fingerprint = rule2.compute_fingerprint()
+        fresh = RuleCard(**base_rule.model_dump(exclude_unset=True)).normalize()
+        assert rule2 == fresh
+        rule2.action.steps.append("another step")
+        assert rule2.compute_fingerprint() != fingerprint
+        rule2.action.steps.pop()
+        assert rule2.compute_fingerprint() == fingerprint
+        rule2.version = 2
+        assert rule2.compute_fingerprint() == rule3.compute_fingerprint()
+
     def test_yaml_loading_and_derived_defaults(self):
         """Test loading YAML rule and asserting derived defaults."""
         # Sample YAML content based on the existing rule
@@ -239,10 +261,10 @@ provenance:
 """
 
         # Parse YAML
-        yaml_data = yaml.safe_load(yaml_content)
+        yaml_data = yaml.load(yaml_content, Loader=_YAML_LOADER)
 
         # Create RuleCard from YAML data
-        rule = RuleCard(**yaml_data).normalize()
+        rule = RuleCard.model_validate(yaml_data).normalize()
 
         # Test derived defaults
         assert rule.retriable is True  # Script action should be retriable
@@ -250,63 +272,61 @@ provenance:
             rule.hint == "Prefer plugins {} DSL over 'apply plugin'"
         )  # Hint should be present
 
-    def test_yaml_loading_script_action_defaults(self):
-        """Test YAML loading with script action sets retriable=True."""
-        yaml_content = """
-schema_version: 1
-id: "RULE-test-script-action"
-name: "Test Script Action"
-version: 1
-status: "active"
-severity: "info"
-domain: "test"
-action:
+    @pytest.mark.parametrize(
+        ("action_yaml", "expected_retriable", "expected_hint"),
+        [
+            (
+                """
   type: "script"
   fix_command: "echo test"
   steps:
     - "Run the fix command"
-provenance:
-  author: "Test"
-  created: "2024-01-15T10:00:00Z"
-  last_updated: "2024-01-15T10:00:00Z"
-"""
-
-        yaml_data = yaml.safe_load(yaml_content)
-        rule = RuleCard(**yaml_data).normalize()
-
-        # Script action should default to retriable=True
-        assert rule.retriable is True
-        # Hint should be derived from first step
-        assert rule.hint == "Run the fix command"
-
-    def test_yaml_loading_manual_action_defaults(self):
-        """Test YAML loading with manual action sets retriable=False."""
-        yaml_content = """
+""",
+                True,
+                "Run the fix command",
+            ),
+            (
+                """
+  type: "manual"
+  steps:
+    - "Do something manually"
+    - "Then do something else"
+""",
+                False,
+                "Do something manually",
+            ),
+        ],
+        ids=["script", "manual"],
+    )
+    def test_yaml_loading_action_defaults(
+        self, action_yaml, expected_retriable, expected_hint
+    ):
+        """Test YAML loading derives retriable and hint from the action."""
+        yaml_content = (
+            """
 schema_version: 1
-id: "RULE-test-manual-action"
-name: "Test Manual Action"
+id: "RULE-test-action-defaults"
+name: "Test Action Defaults"
 version: 1
 status: "active"
 severity: "info"
 domain: "test"
-action:
-  type: "manual"
-  steps:
-    - "Do something manually"
-    - "Then do something else"
-provenance:
+action:"""
+            + action_yaml
+            + """provenance:
   author: "Test"
   created: "2024-01-15T10:00:00Z"
   last_updated: "2024-01-15T10:00:00Z"
 """
+        )
 
-        yaml_data = yaml.safe_load(yaml_content)
-        rule = RuleCard(**yaml_data).normalize()
+        yaml_data = yaml.load(yaml_content, Loader=_YAML_LOADER)
+        rule = RuleCard.model_validate(yaml_data).normalize()
 
-        # Manual action should default to retriable=False
-        assert rule.retriable is False
+        # Script actions default to retriable, manual ones do not
+        assert rule.retriable is expected_retriable
         # Hint should be derived from first step
-        assert rule.hint == "Do something manually"
+        assert rule.hint == expected_hint
 
 
 class TestPackRequest:
@@ -331,23 +351,11 @@ class TestPackRequest:
 class TestPackBundle:
     """Test PackBundle model."""
 
-    def test_pack_bundle_creation(self):
+    def test_pack_bundle_creation(self, base_rule):
         """Test creating a pack bundle."""
         request = PackRequest(path="/test")
-        rule = RuleCard(
-            schema_version=1,
-            id="RULE-test-bundle",
-            name="Bundle Test",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.MANUAL, steps=["test"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
+        rule = base_rule.model_copy(
+            update={"id": "RULE-test-bundle", "name": "Bundle Test"}
         )
 
         bundle = PackBundle(
@@ -367,31 +375,34 @@ class TestPackBundle:
         assert bundle.total_rules == 1
         assert bundle.pack_fingerprint is not None
 
-    def test_bundle_fingerprint_stability(self):
+    def test_bundle_fingerprint_pinned(self):
+        """Test the default max file size leaves bundle fingerprints unchanged."""
+
+        def fingerprint(**fields):
+            return PackBundle(
+                pack_request=PackRequest(path="/test", intent_tags=["x"], **fields),
+                rules=[],
+                created_at="2024-01-01T00:00:00Z",
+                hermez_version="1.0.0",
+            ).pack_fingerprint
+
+        pinned = "c91c073f62d8ab82e1f1ba8ac86005160c238a4fd02db1ab37242ef0b26628c1"
+        assert fingerprint() == pinned
+        assert fingerprint(max_file_size_bytes=DEFAULT_MAX_FILE_SIZE_BYTES) == pinned
+        assert fingerprint(max_file_size_bytes=None) != pinned
+
+    def test_bundle_fingerprint_stability(self, base_rule):
         """Test that bundle fingerprints are stable."""
         request = PackRequest(path="/test")
-        rule = RuleCard(
-            schema_version=1,
-            id="RULE-test-fp",
-            name="Fingerprint Test",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.MANUAL, steps=["test"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
-        )
+        rule = base_rule.model_copy(deep=True)
+        fingerprint = rule.compute_fingerprint()
 
         bundle1 = PackBundle(
             pack_request=request,
             rules=[
                 RuleMatch(
                     rule=rule,
-                    fingerprint=rule.compute_fingerprint(),
+                    fingerprint=fingerprint,
                     triggered_by=["trigger"],
                     detected_in=["file.txt"],
                 )
@@ -403,7 +414,7 @@ class TestPackBundle:
             rules=[
                 RuleMatch(
                     rule=rule,
-                    fingerprint=rule.compute_fingerprint(),
+                    fingerprint=fingerprint,
                     triggered_by=["trigger"],
                     detected_in=["file.txt"],
                 )
@@ -417,64 +428,46 @@ class TestPackBundle:
 class TestEnums:
     """Test enum values and ordering."""
 
-    def test_status_values(self):
-        """Test Status enum values."""
-        assert Status.DRAFT.value == "draft"
-        assert Status.ACTIVE.value == "active"
-        assert Status.DEPRECATED.value == "deprecated"
-
-    def test_severity_values(self):
-        """Test Severity enum values."""
-        assert Severity.INFO.value == "info"
-        assert Severity.WARNING.value == "warning"
-        assert Severity.ERROR.value == "error"
-
-    def test_action_type_values(self):
-        """Test ActionType enum values."""
-        assert ActionType.MANUAL.value == "manual"
-        assert ActionType.SCRIPT.value == "script"
-        assert ActionType.DOC.value == "doc"
-
-    def test_detector_type_values(self):
-        """Test DetectorType enum values."""
-        assert DetectorType.REGEX.value == "regex"
-        assert DetectorType.FILE_EXISTS.value == "file_exists"
-        assert DetectorType.PATH_CONTAINS.value == "path_contains"
-
-    def test_trigger_type_values(self):
-        """Test TriggerType enum values."""
-        assert TriggerType.PATH_CONTAINS.value == "path_contains"
-        assert TriggerType.FILE_EXISTS.value == "file_exists"
+    @pytest.mark.parametrize(
+        ("member", "expected"),
+        [
+            (Status.DRAFT, "draft"),
+            (Status.ACTIVE, "active"),
+            (Status.DEPRECATED, "deprecated"),
+            (Severity.INFO, "info"),
+            (Severity.WARNING, "warning"),
+            (Severity.ERROR, "error"),
+            (ActionType.MANUAL, "manual"),
+            (ActionType.SCRIPT, "script"),
+            (ActionType.DOC, "doc"),
+            (DetectorType.REGEX, "regex"),
+            (DetectorType.FILE_EXISTS, "file_exists"),
+            (DetectorType.PATH_CONTAINS, "path_contains"),
+            (TriggerType.PATH_CONTAINS, "path_contains"),
+            (TriggerType.FILE_EXISTS, "file_exists"),
+        ],
+        ids=str,
+    )
+    def test_enum_values(self, member, expected):
+        """Test enum members serialize to their documented string values."""
+        assert member.value == expected
 
 
 class TestModelSerialization:
     """Test model JSON serialization."""
 
-    def test_rule_card_serialization(self):
+    def test_rule_card_serialization(self, base_rule):
         """Test RuleCard JSON serialization."""
-        rule = RuleCard(
-            schema_version=1,
-            id="RULE-test-serialize",
-            name="Serialize Test",
-            version=1,
-            status=Status.ACTIVE,
-            severity=Severity.INFO,
-            domain="test",
-            action=Action(type=ActionType.MANUAL, steps=["test"]),
-            provenance=Provenance(
-                author="test",
-                created="2024-01-01T00:00:00Z",
-                last_updated="2024-01-01T00:00:00Z",
-            ),
+        rule = base_rule.model_copy(
+            update={"id": "RULE-test-serialize", "name": "Serialize Test"}
         )
 
         # Should serialize to JSON
         json_str = rule.model_dump_json()
         assert json_str is not None
 
-        # Should deserialize back
-        rule_dict = json.loads(json_str)
-        rule_copy = RuleCard(**rule_dict)
+        # Should deserialize back, validating straight from the JSON string
+        rule_copy = RuleCard.model_validate_json(json_str)
         assert rule_copy.id == rule.id
 
     def test_pack_bundle_serialization(self):
@@ -486,40 +479,51 @@ class TestModelSerialization:
         json_str = bundle.model_dump_json()
         assert json_str is not None
 
-        # Should deserialize back
-        bundle_dict = json.loads(json_str)
-        bundle_copy = PackBundle(**bundle_dict)
+        # Should deserialize back, validating straight from the JSON string
+        bundle_copy = PackBundle.model_validate_json(json_str)
         assert bundle_copy.pack_request.path == bundle.pack_request.path
 
 
 class TestSchemaExport:
     """Test JSON schema export functionality."""
 
-    def test_json_schema_export_exists(self):
+    @pytest.fixture
+    def mocked_export(self, monkeypatch):
+        """Replace the filesystem, serializer and print calls of the export."""
+        # unittest.mock pulls in asyncio, so only import it when needed
+        from unittest.mock import MagicMock
+
+        mocks = SimpleNamespace(
+            mkdir=MagicMock(),
+            open=MagicMock(),
+            dump=MagicMock(return_value=b"{}"),
+            print=MagicMock(),
+        )
+        monkeypatch.setattr("pathlib.Path.mkdir", mocks.mkdir)
+        monkeypatch.setattr("builtins.open", mocks.open)
+        monkeypatch.setattr("hermezos.models._schema_to_json", mocks.dump)
+        monkeypatch.setattr("builtins.print", mocks.print)
+        return mocks
+
+    def test_json_schema_export_exists(self, mocked_export):
         """Test that JSON schema export function exists and works."""
-        with (
-            patch("pathlib.Path.mkdir") as mock_mkdir,
-            patch("builtins.open", create=True) as mock_open,
-            patch("json.dump") as mock_dump,
-            patch("builtins.print") as mock_print,
-        ):
-            # Create a temporary directory path
-            output_dir = Path("/tmp/test_schemas")
+        # Create a temporary directory path
+        output_dir = Path("/tmp/test_schemas")
 
-            # Call the export function
-            export_json_schemas(output_dir)
+        # Call the export function
+        export_json_schemas(output_dir)
 
-            # Verify mkdir was called
-            mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
+        # Verify mkdir was called
+        mocked_export.mkdir.assert_called_once_with(parents=True, exist_ok=True)
 
-            # Verify open was called for each schema (4 schemas)
-            assert mock_open.call_count == 4
+        # Verify open was called for each schema (4 schemas)
+        assert mocked_export.open.call_count == 4
 
-            # Verify json.dump was called for each schema
-            assert mock_dump.call_count == 4
+        # Verify each schema was serialized
+        assert mocked_export.dump.call_count == 4
 
-            # Verify print was called for each schema
-            assert mock_print.call_count == 4
+        # Verify print was called for each schema
+        assert mocked_export.print.call_count == 4
 
     def test_json_schema_export_creates_files(self, tmp_path):
         """Test that JSON schema export creates the expected files."""
@@ -539,7 +543,6 @@ class TestSchemaExport:
             assert schema_file.exists(), f"Schema file {filename} was not created"
 
             # Verify it's valid JSON
-            with open(schema_file) as f:
-                schema_data = json.load(f)
-                assert isinstance(schema_data, dict)
-                assert "$schema" in schema_data or "type" in schema_data
+            schema_data = json.loads(schema_file.read_bytes())
+            assert isinstance(schema_data, dict)
+            assert "$schema" in schema_data or "type" in schema_data
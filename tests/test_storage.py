@@ -0,0 +1,237 @@
+"""Tests for HermezOS filesystem storage."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from hermezos.models import (
+    Action,
+    ActionType,
+    Detector,
+    DetectorType,
+    Provenance,
+    Reference,
+    RuleCard,
+    Scope,
+    Severity,
+    Status,
+    Trigger,
+    TriggerType,
+)
+from hermezos.storage.filesystem import FileSystemStorage
+
+
+class TestFileSystemStorage:
+    """Test FileSystemStorage loading, caching, writes and validation."""
+
+    @pytest.fixture
+    def sample_rule(self):
+        """Create the Android test rule used across storage tests."""
+        return RuleCard(
+            schema_version=1,
+            id="RULE-android-test",
+            name="Test Android Rule",
+            version=1,
+            status=Status.ACTIVE,
+            severity=Severity.WARNING,
+            domain="android",
+            intent_tags=["test"],
+            scope=Scope(file_globs=["*.gradle"], languages=["groovy"]),
+            triggers=[Trigger(type=TriggerType.PATH_CONTAINS, value=".gradle")],
+            detectors=[Detector(type=DetectorType.REGEX, pattern=r"test.*")],
+            action=Action(type=ActionType.MANUAL, steps=["Fix the test issue"]),
+            provenance=Provenance(
+                author="Test",
+                created="2024-01-15T10:00:00Z",
+                last_updated="2024-01-15T10:00:00Z",
+            ),
+        )
+
+    @pytest.fixture
+    def temp_registry(self, sample_rule):
+        """Create a temporary registry for testing."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            registry_path = Path(temp_dir) / "registry"
+            registry_path.mkdir()
+
+            # Create test rules
+            android_domain = registry_path / "android"
+            android_domain.mkdir()
+
+            # Save rule to file
+            storage = FileSystemStorage(registry_path)
+            storage.save_card(sample_rule)
+
+            yield registry_path
+
+    def test_parallel_load_matches_sequential(self, temp_registry, monkeypatch, capsys):
+        """Test that threaded card loading keeps order and reports errors."""
+        (temp_registry / "android" / "broken.yaml").write_text("id: [unclosed\n")
+        storage = FileSystemStorage(temp_registry)
+        sequential = storage.load_all_cards()
+
+        monkeypatch.setattr("hermezos.storage.filesystem._PARALLEL_LOAD_MIN_FILES", 1)
+        parallel = storage.load_all_cards()
+
+        assert [card.id for card in sequential] == ["RULE-android-test"]
+        assert parallel == sequential
+        assert capsys.readouterr().out.count("Error loading") == 2
+
+    def test_memory_mapped_load(self, temp_registry, monkeypatch):
+        """Test large card files parse the same through a memory map."""
+        expected = FileSystemStorage(temp_registry).load_all_cards()
+
+        monkeypatch.setattr("hermezos.storage.filesystem._MMAP_MIN_SIZE", 0)
+        assert FileSystemStorage(temp_registry).load_all_cards() == expected
+
+    def test_parsed_cards_are_cached(self, temp_registry, monkeypatch):
+        """Test unchanged card files are not parsed again."""
+        from hermezos.storage import filesystem
+
+        calls = []
+        load_yaml = filesystem._load_yaml
+        monkeypatch.setattr(
+            filesystem,
+            "_load_yaml",
+            lambda *args: calls.append(args) or load_yaml(*args),
+        )
+
+        storage = FileSystemStorage(temp_registry)
+        first = storage.get_rule("RULE-android-test")
+        first.name = "Changed in memory"
+        first.intent_tags.append("changed")
+        second = storage.get_rule("RULE-android-test")
+
+        assert len(calls) == 1
+        assert second.name == "Test Android Rule"
+        assert "changed" not in second.intent_tags
+        assert storage.load_all_cards()[0].name == "Test Android Rule"
+        assert len(calls) == 1
+
+        storage.save_card(first)
+        assert storage.get_rule("RULE-android-test").name == "Changed in memory"
+        assert len(calls) == 2
+
+    def test_durable_writes_fsync(self, sample_rule, tmp_path, monkeypatch):
+        """Test saved cards are only fsynced when durable writes are enabled."""
+        synced = []
+        monkeypatch.setattr("os.fsync", synced.append)
+
+        FileSystemStorage(tmp_path).save_card(sample_rule)
+        assert synced == []
+
+        storage = FileSystemStorage(tmp_path, durable_writes=True)
+        storage.save_card(sample_rule)
+        assert len(synced) == 1
+        assert storage.get_rule(sample_rule.id) == sample_rule
+        assert list(tmp_path.rglob("*.tmp")) == []
+
+    def test_direct_writes(self, sample_rule, tmp_path, monkeypatch):
+        """Test cards can be saved in place without a temporary file."""
+        monkeypatch.setattr(
+            "tempfile.mkstemp", lambda *args, **kwargs: pytest.fail("mkstemp")
+        )
+
+        storage = FileSystemStorage(tmp_path, atomic_writes=False)
+        storage.save_card(sample_rule)
+        assert storage.get_rule(sample_rule.id) == sample_rule
+
+    def test_local_reference_checks(self, sample_rule, tmp_path):
+        """Test local doc references are checked once per validate pass."""
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "found.md").write_text("# Found\n")
+        rule = sample_rule.model_copy(
+            update={
+                "references": [
+                    Reference(doc_url="./docs/found.md"),
+                    Reference(doc_url="./docs/missing.md"),
+                    Reference(doc_url="https://example.com/doc"),
+                ]
+            }
+        )
+
+        storage = FileSystemStorage(tmp_path / "registry")
+        local_references = storage.check_local_references([rule, rule])
+        assert local_references == {
+            "./docs/found.md": True,
+            "./docs/missing.md": False,
+        }
+
+        missing = ["Referenced documentation not found: ./docs/missing.md"]
+        assert storage.validate_rule(rule) == missing
+        assert storage.validate_rule(rule, local_references=local_references) == missing
+
+    def test_regex_detector_validation(self, sample_rule, tmp_path):
+        """Test that invalid regex detectors are errors and risky ones warnings."""
+        storage = FileSystemStorage(tmp_path / "registry")
+
+        def with_pattern(pattern):
+            return sample_rule.model_copy(
+                update={
+                    "detectors": [Detector(type=DetectorType.REGEX, pattern=pattern)]
+                }
+            )
+
+        nested = with_pattern(r"(\w+\s*)+$")
+        assert storage.validate_rule(nested) == []
+        assert storage.rule_warnings(nested) == [
+            r"Regex pattern '(\w+\s*)+$' nests unbounded quantifiers and may "
+            "backtrack catastrophically"
+        ]
+        assert storage.validate_rule(with_pattern("plugins (")) == [
+            "Invalid regex pattern 'plugins (': missing ), unterminated "
+            "subpattern at position 8"
+        ]
+        assert storage.rule_warnings(with_pattern("plugins (")) == []
+        # Bounded, possessive, atomic and delimited repeats are fine
+        for pattern in (
+            r"(\w{1,8},?)+$",
+            r"(\w++,?)+$",
+            r"(?>\w+\s*)+$",
+            r"(\w+\.)*",
+            r"(\d+,)*",
+        ):
+            assert storage.validate_rule(with_pattern(pattern)) == []
+            assert storage.rule_warnings(with_pattern(pattern)) == []
+
+    def test_yaml_12_scalars_round_trip(self, sample_rule, tmp_path):
+        """Test saved cards with YAML 1.1 look-alike strings load back unchanged."""
+        rule = sample_rule.model_copy(
+            update={
+                "name": "12:00:00",
+                "intent_tags": ["1:30", "010", "yes", "1_000"],
+                "action": Action(type=ActionType.MANUAL, steps=["1:30", "0x1F"]),
+            }
+        )
+        storage = FileSystemStorage(tmp_path)
+        storage.save_card(rule)
+        assert FileSystemStorage(tmp_path).get_rule(rule.id) == rule
+
+        # Hand-written numbers are read as YAML 1.2 decimals, not octal
+        path = next(tmp_path.rglob("*.yaml"))
+        path.write_text(path.read_text().replace("version: 1\n", "version: 010\n"))
+        assert FileSystemStorage(tmp_path).get_rule(rule.id).version == 10
+
+    def test_script_checks_follow_file_changes(self, sample_rule, tmp_path):
+        """Test script checks see scripts created or chmod'ed after a check."""
+        storage = FileSystemStorage(tmp_path / "registry")
+        script = tmp_path / "fix.sh"
+        rule = sample_rule.model_copy(
+            update={
+                "action": Action(type=ActionType.SCRIPT, fix_command="./fix.sh --all")
+            }
+        )
+
+        assert storage.validate_rule(rule) == [
+            f"Script file not found: {script.resolve()}"
+        ]
+
+        script.write_text("#!/bin/sh\n")
+        script.chmod(0o644)
+        assert storage.validate_rule(rule) == [
+            f"Script is not executable: {script.resolve()}"
+        ]
+
+        script.chmod(0o755)
+        assert storage.validate_rule(rule) == []